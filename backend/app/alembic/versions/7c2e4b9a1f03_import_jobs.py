@@ -0,0 +1,47 @@
+"""import jobs
+
+Revision ID: 7c2e4b9a1f03
+Revises: c5f1099ab166
+Create Date: 2026-10-16 09:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4b9a1f03'
+down_revision: Union[str, Sequence[str], None] = 'c5f1099ab166'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('importjob',
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('filename', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('cards_parsed', sa.Integer(), nullable=False),
+    sa.Column('contacts_created', sa.Integer(), nullable=False),
+    sa.Column('contacts_skipped', sa.Integer(), nullable=False),
+    sa.Column('warnings', sa.JSON(), nullable=True),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('path', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_importjob_created_at'), 'importjob', ['created_at'], unique=False)
+    op.create_index(op.f('ix_importjob_user_id'), 'importjob', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_importjob_user_id'), table_name='importjob')
+    op.drop_index(op.f('ix_importjob_created_at'), table_name='importjob')
+    op.drop_table('importjob')
@@ -0,0 +1,44 @@
+"""contact search
+
+Revision ID: 9d41f6c2a8b7
+Revises: 7c2e4b9a1f03
+Create Date: 2026-10-16 11:40:02.913554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41f6c2a8b7'
+down_revision: Union[str, Sequence[str], None] = '7c2e4b9a1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram indexes serve prefix/infix ILIKE and fuzzy (%) matching
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_contact_name_trgm', 'contact', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_contact_email_trgm', 'contact', ['email'], unique=False, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    op.create_index('ix_phone_number_trgm', 'phone', ['number'], unique=False, postgresql_using='gin', postgresql_ops={'number': 'gin_trgm_ops'})
+    # Must match the document expression in app.search
+    op.create_index(
+        'ix_contact_search_tsv',
+        'contact',
+        [sa.text("to_tsvector('simple'::regconfig, contact.name || ' ' || coalesce(contact.email, ''))")],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contact_search_tsv', table_name='contact')
+    op.drop_index('ix_phone_number_trgm', table_name='phone')
+    op.drop_index('ix_contact_email_trgm', table_name='contact')
+    op.drop_index('ix_contact_name_trgm', table_name='contact')
@@ -0,0 +1,39 @@
+"""phone number extensions
+
+Revision ID: a3d7c9e1f5b2
+Revises: f1c8a4d6b2e7
+Create Date: 2026-10-18 09:12:31.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d7c9e1f5b2'
+down_revision: Union[str, Sequence[str], None] = 'f1c8a4d6b2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Room for an ";ext=" suffix after the 15 digits
+    op.alter_column('phone', 'number', existing_type=sqlmodel.sql.sqltypes.AutoString(length=20), type_=sqlmodel.sql.sqltypes.AutoString(length=32), existing_nullable=False)
+    # Canonical numbers no longer start with "+"; numbers that were left as typed keep theirs
+    op.execute("UPDATE phone SET number = substr(number, 2) WHERE number LIKE '+%' AND number_digits = substr(number, 2)")
+    # Searches match digits, not the stored format
+    op.drop_index('ix_phone_number_trgm', table_name='phone')
+    op.create_index('ix_phone_number_digits_trgm', 'phone', ['number_digits'], unique=False, postgresql_using='gin', postgresql_ops={'number_digits': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_phone_number_digits_trgm', table_name='phone')
+    op.create_index('ix_phone_number_trgm', 'phone', ['number'], unique=False, postgresql_using='gin', postgresql_ops={'number': 'gin_trgm_ops'})
+    # Extensions do not fit the old column
+    op.execute("UPDATE phone SET number = split_part(number, ';', 1) WHERE number LIKE '%;ext=%'")
+    op.alter_column('phone', 'number', existing_type=sqlmodel.sql.sqltypes.AutoString(length=32), type_=sqlmodel.sql.sqltypes.AutoString(length=20), existing_nullable=False)
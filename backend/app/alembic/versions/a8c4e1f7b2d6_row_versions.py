@@ -0,0 +1,39 @@
+"""row versions
+
+Revision ID: a8c4e1f7b2d6
+Revises: f4b7d2e9a5c1
+Create Date: 2026-10-16 16:10:52.630941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e1f7b2d6'
+down_revision: Union[str, Sequence[str], None] = 'f4b7d2e9a5c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('contacts_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('contact', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('contact', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column('phone', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('phone', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    # Existing rows got now(); new rows get their timestamp from the application
+    op.alter_column('contact', 'updated_at', server_default=None)
+    op.alter_column('phone', 'updated_at', server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('phone', 'updated_at')
+    op.drop_column('phone', 'version')
+    op.drop_column('contact', 'updated_at')
+    op.drop_column('contact', 'version')
+    op.drop_column('user', 'contacts_version')
@@ -0,0 +1,94 @@
+"""phone number digits
+
+Revision ID: b3e8f1a7c640
+Revises: 9d41f6c2a8b7
+Create Date: 2026-10-16 13:05:44.702391
+
+"""
+from typing import Sequence, Union
+
+import re
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f1a7c640'
+down_revision: Union[str, Sequence[str], None] = '9d41f6c2a8b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+phone = sa.table(
+    'phone',
+    sa.column('id', sa.Uuid()),
+    sa.column('number', sa.String()),
+    sa.column('number_digits', sa.String()),
+)
+
+# Frozen copy of app.phone_numbers.normalize_number as of this revision, so
+# the backfill gives the same result whenever it runs. It assumes no default
+# country code: national numbers keep their digits, and lookup_keys matches
+# them against international caller IDs.
+_EXTENSION = re.compile(r"\s*(?:;ext=|ext\.?|extension|x|#)\s*\d+\s*$", re.IGNORECASE)
+_SEPARATORS = re.compile(r"[\s\-./()\[\]]")
+
+
+def _normalize(raw: str) -> str | None:
+    """The canonical number, or None if `raw` is not a phone number."""
+    value = _SEPARATORS.sub("", _EXTENSION.sub("", (raw or "").strip()))
+    if value.startswith("00"):
+        value = "+" + value[2:]
+    digits = value.removeprefix("+")
+    if not digits.isdigit() or not 3 <= len(digits) <= 15:
+        return None
+    return value
+
+
+def _backfill() -> None:
+    """Normalize existing numbers in id order, one batch at a time.
+
+    Numbers that cannot be parsed are left as typed, with their plain digits
+    (if any) stored for lookup.
+    """
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(phone.c.id, phone.c.number).order_by(phone.c.id).limit(BACKFILL_BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(phone.c.id > last_id)
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            number = _normalize(row.number)
+            if number is None:
+                updates.append({"b_id": row.id, "b_number": row.number, "b_digits": "".join(filter(str.isdigit, row.number or ""))[:20] or None})
+            else:
+                updates.append({"b_id": row.id, "b_number": number, "b_digits": number.lstrip("+")})
+        conn.execute(
+            phone.update()
+            .where(phone.c.id == sa.bindparam("b_id"))
+            .values(number=sa.bindparam("b_number"), number_digits=sa.bindparam("b_digits")),
+            updates,
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('phone', sa.Column('number_digits', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True))
+    if not context.is_offline_mode():
+        _backfill()
+    op.create_index(op.f('ix_phone_number_digits'), 'phone', ['number_digits'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_phone_number_digits'), table_name='phone')
+    op.drop_column('phone', 'number_digits')
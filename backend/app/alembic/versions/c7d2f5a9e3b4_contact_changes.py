@@ -0,0 +1,46 @@
+"""contact changes
+
+Revision ID: c7d2f5a9e3b4
+Revises: a8c4e1f7b2d6
+Create Date: 2026-10-16 17:24:18.905512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f5a9e3b4'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e1f7b2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contact', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_contact_user_id_change_seq', 'contact', ['user_id', 'change_seq', 'id'], unique=False)
+    op.create_table('tombstone',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('object_id', sa.Uuid(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstone_user_id_change_seq', 'tombstone', ['user_id', 'change_seq'], unique=False)
+    op.create_index(op.f('ix_tombstone_deleted_at'), 'tombstone', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tombstone_deleted_at'), table_name='tombstone')
+    op.drop_index('ix_tombstone_user_id_change_seq', table_name='tombstone')
+    op.drop_table('tombstone')
+    op.drop_index('ix_contact_user_id_change_seq', table_name='contact')
+    op.drop_column('contact', 'change_seq')
@@ -0,0 +1,43 @@
+"""contact dedup keys
+
+Revision ID: d9e3a6b1c5f8
+Revises: c7d2f5a9e3b4
+Create Date: 2026-10-16 18:41:52.306417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e3a6b1c5f8'
+down_revision: Union[str, Sequence[str], None] = 'c7d2f5a9e3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing contacts have change_seq 0: dedup_seq starts below it, so each
+    # user's keys are built for all of their contacts on first use
+    op.add_column('user', sa.Column('dedup_seq', sa.Integer(), server_default='-1', nullable=False))
+    op.create_table('contactkey',
+    sa.Column('contact_id', sa.Uuid(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+    sa.Column('value', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['contact_id'], ['contact.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('contact_id', 'kind', 'value')
+    )
+    op.create_index('ix_contactkey_user_id_kind_value', 'contactkey', ['user_id', 'kind', 'value', 'contact_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contactkey_user_id_kind_value', table_name='contactkey')
+    op.drop_table('contactkey')
+    op.drop_column('user', 'dedup_seq')
@@ -0,0 +1,64 @@
+"""index tuning
+
+Revision ID: e6a1c3d8f2b9
+Revises: b3e8f1a7c640
+Create Date: 2026-10-16 14:21:09.583127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c3d8f2b9'
+down_revision: Union[str, Sequence[str], None] = 'b3e8f1a7c640'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes duplicating the primary key index of their table
+REDUNDANT_PK_INDEXES = [
+    ('ix_user_id', 'user'),
+    ('ix_contact_id', 'contact'),
+    ('ix_phone_id', 'phone'),
+    ('ix_securityqa_id', 'securityqa'),
+    ('ix_tokenblacklist_id', 'tokenblacklist'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table in REDUNDANT_PK_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    # Fails if existing rows already contain duplicates; resolve those first
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+
+    op.create_index('ix_contact_user_id_name_id', 'contact', ['user_id', 'name', 'id'], unique=False, postgresql_include=['email'])
+    op.create_index('ix_phone_contact_id_number_id', 'phone', ['contact_id', 'number', 'id'], unique=False, postgresql_include=['number_type'])
+    op.create_index(op.f('ix_securityqa_user_id'), 'securityqa', ['user_id'], unique=False)
+
+    op.drop_index(op.f('ix_importjob_created_at'), table_name='importjob')
+    op.create_index('ix_importjob_queued', 'importjob', ['created_at'], unique=False, postgresql_where=sa.text("status = 'queued'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_importjob_queued', table_name='importjob')
+    op.create_index(op.f('ix_importjob_created_at'), 'importjob', ['created_at'], unique=False)
+
+    op.drop_index(op.f('ix_securityqa_user_id'), table_name='securityqa')
+    op.drop_index('ix_phone_contact_id_number_id', table_name='phone')
+    op.drop_index('ix_contact_user_id_name_id', table_name='contact')
+
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=False)
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=False)
+
+    for name, table in REDUNDANT_PK_INDEXES:
+        op.create_index(name, table, ['id'], unique=False)
@@ -0,0 +1,32 @@
+"""import job heartbeat
+
+Revision ID: f1c8a4d6b2e7
+Revises: d9e3a6b1c5f8
+Create Date: 2026-10-17 10:05:44.120953
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c8a4d6b2e7'
+down_revision: Union[str, Sequence[str], None] = 'd9e3a6b1c5f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('importjob', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    # Jobs already running have no heartbeat; start their clock now
+    op.execute("UPDATE importjob SET heartbeat_at = now() WHERE status = 'running'")
+    op.create_index('ix_importjob_running', 'importjob', ['heartbeat_at'], unique=False, postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_importjob_running', table_name='importjob')
+    op.drop_column('importjob', 'heartbeat_at')
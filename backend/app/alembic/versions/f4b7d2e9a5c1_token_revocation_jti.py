@@ -0,0 +1,88 @@
+"""token revocation by jti
+
+Revision ID: f4b7d2e9a5c1
+Revises: e6a1c3d8f2b9
+Create Date: 2026-10-16 15:02:37.114820
+
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import jwt
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b7d2e9a5c1'
+down_revision: Union[str, Sequence[str], None] = 'e6a1c3d8f2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+tokenblacklist = sa.table(
+    'tokenblacklist',
+    sa.column('id', sa.Uuid()),
+    sa.column('token', sa.String()),
+    sa.column('jti', sa.String()),
+    sa.column('expires_at', sa.DateTime(timezone=True)),
+    sa.column('revoked_at', sa.DateTime(timezone=True)),
+)
+
+
+def _backfill() -> None:
+    """Key existing rows like app.revocation.token_key; drop rows whose token already expired."""
+    conn = op.get_bind()
+    now = datetime.now(timezone.utc)
+    for row in conn.execute(sa.select(tokenblacklist.c.id, tokenblacklist.c.token)).all():
+        try:
+            payload = jwt.decode(row.token, options={"verify_signature": False})
+            expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+        except (jwt.PyJWTError, KeyError):
+            expires_at = now
+        if expires_at <= now:
+            conn.execute(tokenblacklist.delete().where(tokenblacklist.c.id == row.id))
+            continue
+
+        jti = payload.get("jti") or hashlib.sha256(row.token.encode()).hexdigest()
+        conn.execute(
+            tokenblacklist.update()
+            .where(tokenblacklist.c.id == row.id)
+            .values(jti=jti, expires_at=expires_at, revoked_at=now)
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tokenblacklist', sa.Column('jti', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.add_column('tokenblacklist', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tokenblacklist', sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True))
+    if not context.is_offline_mode():
+        _backfill()
+    else:
+        # Plain SQL cannot decode the stored tokens; their revocations are dropped
+        op.execute(tokenblacklist.delete())
+
+    op.alter_column('tokenblacklist', 'jti', nullable=False)
+    op.alter_column('tokenblacklist', 'expires_at', nullable=False)
+    op.alter_column('tokenblacklist', 'revoked_at', nullable=False)
+    op.drop_index(op.f('ix_tokenblacklist_token'), table_name='tokenblacklist')
+    op.drop_column('tokenblacklist', 'token')
+    op.create_index(op.f('ix_tokenblacklist_jti'), 'tokenblacklist', ['jti'], unique=True)
+    op.create_index(op.f('ix_tokenblacklist_expires_at'), 'tokenblacklist', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_tokenblacklist_revoked_at'), 'tokenblacklist', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Revocations keyed by jti cannot be turned back into token strings
+    op.drop_index(op.f('ix_tokenblacklist_revoked_at'), table_name='tokenblacklist')
+    op.drop_index(op.f('ix_tokenblacklist_expires_at'), table_name='tokenblacklist')
+    op.drop_index(op.f('ix_tokenblacklist_jti'), table_name='tokenblacklist')
+    op.execute(tokenblacklist.delete())
+    op.add_column('tokenblacklist', sa.Column('token', sqlmodel.sql.sqltypes.AutoString(), nullable=False))
+    op.create_index(op.f('ix_tokenblacklist_token'), 'tokenblacklist', ['token'], unique=True)
+    op.drop_column('tokenblacklist', 'revoked_at')
+    op.drop_column('tokenblacklist', 'expires_at')
+    op.drop_column('tokenblacklist', 'jti')
@@ -0,0 +1,53 @@
+import hashlib
+
+from fastapi import HTTPException, Response
+
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def row_etag(*versions: int) -> str:
+    """Strong ETag of a single resource from its version(s)."""
+    return '"' + ".".join(str(version) for version in versions) + '"'
+
+
+def collection_etag(version: int, query: str) -> str:
+    """Strong ETag of a list response: the user's contacts_version plus the query string."""
+    digest = hashlib.sha256(query.encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """True when an If-None-Match header matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = _tags(if_none_match)
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def if_match_versions(if_match: str | None, size: int) -> tuple[int, ...] | None:
+    """Versions expected by an If-Match header, or None when the write is unconditional.
+
+    A tag that is not one of our row ETags can never match, so it fails with 412.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+
+    tag = if_match.strip()
+    if tag.startswith('"') and tag.endswith('"') and "," not in tag:
+        parts = tag[1:-1].split(".")
+        if len(parts) == size and all(part.isdigit() for part in parts):
+            return tuple(int(part) for part in parts)
+    raise HTTPException(status_code=412, detail="Precondition failed")
@@ -1,29 +1,75 @@
-import os
 import hashlib
+import os
+import time
+import uuid
 import jwt
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from typing import Annotated
+from typing import Annotated, AsyncGenerator
+from app.cache import TTLCache
 from app.db import get_session
-from app.models import User
+from app.metrics import CACHES
+from app.models import User, UserPublic
+from app.replicas import replica_pool
 from sqlmodel import Session, select
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Optional asymmetric signing (needs pyjwt[crypto]): a private JWK on the node
+# issuing tokens, and a JWK Set with the public keys on every verifying node.
+# A node with only the private JWK verifies with its public half. Without
+# them tokens are signed with SECRET_KEY and ALGORITHM.
+JWT_PRIVATE_JWK = os.getenv("JWT_PRIVATE_JWK")
+JWT_PUBLIC_JWKS = os.getenv("JWT_PUBLIC_JWKS")
 
 security = HTTPBearer()
 
+# Authenticated principals keyed on the token subject (username)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Verified token claims keyed on a digest of the token, each kept until its exp
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+CACHES.register("principal", principal_cache)
+CACHES.register("jwt", token_cache)
+
+
+
+def _public_jwk(private: jwt.PyJWK) -> jwt.PyJWK:
+    """The key verifying what `private` signs (itself for symmetric keys)."""
+    key = private.key.public_key() if hasattr(private.key, "public_key") else private.key
+    return jwt.PyJWK({**private.Algorithm.to_jwk(key, as_dict=True), "kid": private.key_id, "alg": private.algorithm_name})
+
+
+# Parsed once at import; PyJWK objects are reused for every token
+signing_key = jwt.PyJWK.from_json(JWT_PRIVATE_JWK) if JWT_PRIVATE_JWK else None
+if JWT_PUBLIC_JWKS:
+    verification_keys = {key.key_id: key for key in jwt.PyJWKSet.from_json(JWT_PUBLIC_JWKS)}
+elif signing_key is not None:
+    verification_keys = {signing_key.key_id: _public_jwk(signing_key)}
+else:
+    verification_keys = {}
+
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+def _encode(claims: dict) -> str:
+    if signing_key is not None:
+        return jwt.encode(claims, signing_key.key, algorithm=signing_key.algorithm_name, headers={"kid": signing_key.key_id})
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
-    return hash_password(plain_password) == hashed_password
+def _verify(token: str) -> dict:
+    if verification_keys:
+        key = verification_keys.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.key, algorithms=[key.algorithm_name])
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -35,7 +81,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
@@ -43,16 +89,25 @@ def create_refresh_token(data: dict):
     """Create a JWT refresh token."""
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # jti identifies the token for revocation on logout
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
 def decode_token(token: str):
-    """Decode and verify a JWT token."""
+    """Decode and verify a JWT token.
+
+    A token verified before is answered from the cache until it expires.
+    Callers get their own copy of the claims.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = _verify(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,8 +124,36 @@ def decode_token(token: str):
             detail="Could not validate credentials"
         )
 
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        token_cache.set(digest, payload, ttl=ttl)
+    return dict(payload)
+
+
+async def load_principal(session: Session, username: str) -> UserPublic | None:
+    """Load the slim principal for a username, without any relationships.
+
+    Principals are cached for PRINCIPAL_CACHE_TTL_SECONDS and unknown usernames
+    are not cached. No endpoint renames or deletes users; one that does must pop
+    the username from principal_cache, or the old principal is served until it expires.
+    """
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
 
-async def get_current_user(session: Annotated[Session, Depends(get_session)], credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
+    result = await session.exec(
+        select(User.id, User.username, User.email).where(User.username == username)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    principal = UserPublic(id=row.id, username=row.username, email=row.email)
+    principal_cache.set(username, principal)
+    return principal
+
+
+async def get_current_user(session: Annotated[Session, Depends(get_session)], credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]) -> UserPublic:
     """Dependency to get the current authenticated user."""
     token = credentials.credentials
     payload = decode_token(token)
@@ -89,13 +172,17 @@ async def get_current_user(session: Annotated[Session, Depends(get_session)], cr
             detail="Could not validate credentials"
         )
     
-    # Get user from database
-    result = await session.exec(select(User).where(User.username == username))
-    user = result.first()
+    # Get user from the principal cache or the database
+    user = await load_principal(session, username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    return user
\ No newline at end of file
+    return user
+
+async def get_read_session(current_user: Annotated[UserPublic, Depends(get_current_user)]) -> AsyncGenerator[Session, None]:
+    """Session for read-only endpoints: a replica, or the primary while the user's own writes may not have replicated."""
+    async with replica_pool.session(current_user.id) as session:
+        yield session
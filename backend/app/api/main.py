@@ -1,20 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from app.api.routers import contacts, login, phones, security_qas, users, utils
+from app.changes import purge_tombstones_forever
+from app.db import dispose_engine, engine
+from app.jobs import import_queue
+from app.replicas import replica_pool
+from app.revocation import revocation_store
+from app.metrics import MetricsMiddleware, instrument_engine
+from app.ratelimit import RateLimitMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await import_queue.start()
+    await revocation_store.start()
+    await replica_pool.start()
+    tombstone_purge = asyncio.create_task(purge_tombstones_forever())
+    yield
+    tombstone_purge.cancel()
+    await replica_pool.stop()
+    await revocation_store.stop()
+    await import_queue.stop()
+    await dispose_engine()
+
+
 app = FastAPI(
     title="Contact On Demand API",
     description="API for Contact On Demand application",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+instrument_engine(engine)
+for replica in replica_pool.engines:
+    instrument_engine(replica)
+# Innermost first: requests pass CORS, metrics, then the rate limiter
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
 
 
@@ -0,0 +1,52 @@
+import base64
+import json
+import uuid
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    raw = json.dumps([str(value) if isinstance(value, uuid.UUID) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor, expecting `size` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return values
+
+
+def decode_keyset(cursor: str) -> tuple[str, uuid.UUID]:
+    """Decode a (sort value, id) keyset cursor."""
+    value, row_id = decode_cursor(cursor, 2)
+    if not isinstance(value, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        return value, uuid.UUID(row_id)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: str | None, allowed: tuple[str, ...]) -> list[str]:
+    """Parse a comma separated `fields` projection, keeping the order of `allowed`."""
+    if fields is None:
+        return list(allowed)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return [field for field in allowed if field in requested]
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import tuple_
 from sqlmodel import Session, select
-from typing import Annotated
+from typing import Annotated, Literal
 from app.db import get_session
-from app.models import Contact, ContactWithPhones, ContactCreate, Phone, PhoneCreate, User
-from app.api.deps import get_current_user
-import vobject
+from app.models import BatchRequest, BatchResponse, Contact, ContactChanges, ContactMerge, DuplicateCluster, ContactWithPhones, ContactCreate, ContactSearchResult, ImportJob, ImportJobPublic, Phone, UserPublic
+from app.api.deps import get_current_user, get_read_session
+from app.crud import delete_owned_contact, get_contacts_version, get_owned_contact, get_owned_contact_version, touch_contacts, update_owned_contact
+from app.api.conditional import collection_etag, etag_headers, if_match_versions, none_match, not_modified, row_etag
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_keyset, encode_cursor, parse_fields
+from app.load_profiles import load_profile
+from app import changes, dedup, export, response_cache, search
+from app.batch import BATCH_MAX_ROWS, apply_batch, batch_rows
+from app.jobs import import_queue, spool_upload
 
+import json
 import uuid
 
 
@@ -16,108 +25,382 @@ router = APIRouter(
 )
 
 
+STREAM_BATCH_SIZE = 500
+CONTACT_FIELDS = ("id", "name", "email", "user_id", "phones")
+
+
+def _contact_row(contact, fields: list[str], phones: list[dict] | None = None) -> dict:
+    """Build a JSON ready contact dict holding only the requested fields."""
+    row = {}
+    for field in fields:
+        if field == "phones":
+            row["phones"] = phones or []
+        else:
+            value = getattr(contact, field)
+            row[field] = str(value) if isinstance(value, uuid.UUID) else value
+    return row
+
+
+def _phone_row(phone) -> dict:
+    return {
+        "id": str(phone.id),
+        "number": phone.number,
+        "number_type": phone.number_type,
+        "contact_id": str(phone.contact_id),
+    }
+
+
 @router.get("/", response_model=list[ContactWithPhones])
 async def read_contacts(
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    limit: Annotated[int | None, Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Annotated[str | None, Query(description="Opaque cursor from the X-Next-Cursor header")] = None,
+    name: Annotated[str | None, Query(description="Only contacts whose name starts with this")] = None,
+    email: Annotated[str | None, Query(description="Only contacts with this email")] = None,
+    fields: Annotated[str | None, Query(description="Comma separated subset of id,name,email,user_id,phones")] = None,
+    stream: Annotated[bool, Query(description="Stream every matching contact as NDJSON")] = False,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Endpoint to read contacts for the authenticated user."""
-    result = await session.exec(select(Contact).where(Contact.user_id == current_user.id))
+    """Endpoint to read contacts for the authenticated user.
+
+    Contacts are ordered by (name, id) and paginated with a keyset cursor returned
+    in the X-Next-Cursor header. With `stream=true` the rows are written as NDJSON
+    while the database cursor produces them, so memory stays flat. The ETag changes
+    with every write to the user's contacts; a matching If-None-Match gets a 304.
+    A stream has no X-Next-Cursor, so it cannot be combined with `limit`.
+    """
+    if stream and limit is not None:
+        raise HTTPException(status_code=400, detail="stream returns every contact and cannot be combined with limit")
+    selected = parse_fields(fields, CONTACT_FIELDS)
+
+    cache_key = f"contacts?{request.url.query}"
+    cached, generation = await response_cache.lookup(current_user.id, cache_key) if not stream else (None, 0)
+    if cached:
+        if none_match(if_none_match, cached.headers["ETag"]):
+            return not_modified(cached.headers["ETag"])
+        return Response(cached.body, media_type="application/json", headers=cached.headers)
+
+    # Read the version before the rows, so a concurrent write can only leave the
+    # ETag older than the body (an extra refetch), never newer (a stale 304)
+    etag = collection_etag(await get_contacts_version(session, current_user.id), request.url.query)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    columns = [Contact.id, Contact.name, Contact.email, Contact.user_id]
+
+    query = select(*columns).where(Contact.user_id == current_user.id)
+    if name:
+        query = query.where(Contact.name.startswith(name, autoescape=True))
+    if email:
+        query = query.where(Contact.email == email)
+    if cursor:
+        after_name, after_id = decode_keyset(cursor)
+        query = query.where(tuple_(Contact.name, Contact.id) > tuple_(after_name, after_id))
+    query = query.order_by(Contact.name, Contact.id)
+
+    if stream:
+        return StreamingResponse(
+            _stream_contacts(session, query, selected),
+            media_type="application/x-ndjson",
+            headers=etag_headers(etag),
+        )
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    result = await session.exec(query.limit(page_size + 1))
     contacts = result.all()
+    has_more = len(contacts) > page_size
+    contacts = contacts[:page_size]
+
+    phones_by_contact: dict[uuid.UUID, list[dict]] = {}
+    if "phones" in selected and contacts:
+        phone_result = await session.exec(
+            select(Phone.id, Phone.number, Phone.number_type, Phone.contact_id)
+            .where(Phone.contact_id.in_([contact.id for contact in contacts]))
+        )
+        for phone in phone_result.all():
+            phones_by_contact.setdefault(phone.contact_id, []).append(_phone_row(phone))
+
+    response = JSONResponse(
+        [_contact_row(contact, selected, phones_by_contact.get(contact.id)) for contact in contacts],
+        headers=etag_headers(etag),
+    )
+    if has_more:
+        last = contacts[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.name, last.id)
+
+    headers = {name: response.headers[name] for name in ("ETag", "Cache-Control", "X-Next-Cursor") if name in response.headers}
+    await response_cache.store(session, current_user.id, cache_key, generation, response.body, headers)
+    return response
+
+
+async def _stream_contacts(session: Session, query, selected: list[str]):
+    """Yield NDJSON lines for `query`, grouping joined phone rows per contact."""
+    if "phones" in selected:
+        query = query.add_columns(
+            Phone.id.label("phone_id"), Phone.number, Phone.number_type
+        ).outerjoin(Phone, Phone.contact_id == Contact.id)
+
+    result = await session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+
+    current = None
+    phones: list[dict] = []
+    async for row in result:
+        if current is not None and row.id != current.id:
+            yield json.dumps(_contact_row(current, selected, phones)) + "\n"
+            phones = []
+        current = row
+        if "phones" in selected and row.phone_id is not None:
+            phones.append({
+                "id": str(row.phone_id),
+                "number": row.number,
+                "number_type": row.number_type,
+                "contact_id": str(row.id),
+            })
+    if current is not None:
+        yield json.dumps(_contact_row(current, selected, phones)) + "\n"
+
+    await result.close()
+
+
+@router.get("/search", response_model=list[ContactSearchResult])
+async def search_contacts(
+    q: Annotated[str, Query(min_length=1, max_length=100, description="Name, email or phone number fragment")],
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    """Search the authenticated user's contacts, best matches first.
+
+    Combines prefix, full-text and trigram fuzzy matching on name and email,
+    and substring matching of the query's digits on phone numbers.
+    """
+    return await search.search_contacts(session, current_user.id, q.strip(), limit, offset)
+
+
+@router.get("/changes", response_model=ContactChanges)
+async def read_contact_changes(
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    since: Annotated[str | None, Query(description="Cursor from the previous sync; omit for a full download")] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+):
+    """Delta sync: contacts created or changed and ids deleted since the cursor.
+
+    Changed contacts come with all their current phones. Keep calling with the
+    returned cursor while `has_more` is true, then store it for the next sync.
+    """
+    return await changes.read_changes(session, current_user.id, since, limit)
+
+
+@router.get("/duplicates", response_model=list[DuplicateCluster])
+async def read_duplicates(
+    session: Annotated[Session, Depends(get_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+):
+    """Groups of the user's contacts that look like duplicates, largest first.
+
+    Contacts are grouped when they sound alike by name, share an email local
+    part or share a phone number; `matched_on` tells which. Merge a group with
+    POST /contacts/{contact_id}/merge.
+    """
+    return await dedup.find_duplicates(session, current_user.id, limit)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_contacts(
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    export_format: Annotated[Literal["vcf", "csv", "jsonl"], Query(alias="format")] = "vcf",
+    accept_encoding: Annotated[str | None, Header()] = None,
+):
+    """Download all of the user's contacts with their phones as vCard, CSV or JSON lines.
+
+    The file is streamed from a server-side cursor in chunks, gzipped on the
+    fly when the client accepts it, so exports of any size start at once and
+    use constant memory. A vCard export can be imported again with /upload-vcf.
+    """
+    media_type, extension = export.EXPORT_FORMATS[export_format]
+    gzip = export.accepts_gzip(accept_encoding)
+    headers = {
+        "Content-Disposition": f'attachment; filename="contacts.{extension}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export.encode_chunks(export.export_text(session, current_user.id, export_format), gzip=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.post("/batch", response_model=BatchResponse, responses={400: {"model": BatchResponse}})
+async def batch_contacts(
+    batch: BatchRequest,
+    session: Annotated[Session, Depends(get_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+):
+    """Create, update and delete contacts and phones in one transaction.
+
+    Operations are checked together and applied all or nothing; the response
+    has one result per operation, in order. If any fails the status is 400
+    and nothing is written.
+    """
+    if not batch.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    if batch_rows(batch.operations) > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"A batch may write at most {BATCH_MAX_ROWS} rows")
+
+    applied, results = await apply_batch(session, current_user.id, batch.operations)
+    if not applied:
+        return JSONResponse(BatchResponse(applied=False, results=results).model_dump(mode="json"), status_code=400)
+
+    await session.commit()
+    await response_cache.invalidate(current_user.id)
+    return BatchResponse(applied=True, results=results)
 
-    return contacts
 
 @router.get("/{contact_id}", response_model=ContactWithPhones)
 async def read_contact(
     contact_id: uuid.UUID,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """Get contact by ID, including associated phones."""
-    contact = await session.get(Contact, contact_id)
+    cache_key = f"contact/{contact_id}"
+    cached, generation = await response_cache.lookup(current_user.id, cache_key)
+    if cached:
+        if none_match(if_none_match, cached.headers["ETag"]):
+            return not_modified(cached.headers["ETag"])
+        return Response(cached.body, media_type="application/json", headers=cached.headers)
+
+    if if_none_match:
+        # Compare against the version alone before loading contact and phones
+        version = await get_owned_contact_version(session, contact_id, current_user.id)
+        if version is not None and none_match(if_none_match, row_etag(version)):
+            return not_modified(row_etag(version))
+
+    contact = await get_owned_contact(session, contact_id, current_user.id, options=load_profile("contact_with_phones"))
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    
-    # Verify the contact belongs to the current user
-    if contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to access this contact")
 
-    return contact
+    headers = etag_headers(row_etag(contact.version))
+    response = JSONResponse(ContactWithPhones.model_validate(contact).model_dump(mode="json"), headers=headers)
+    await response_cache.store(session, current_user.id, cache_key, generation, response.body, headers)
+    return response
 
 
 @router.post("/", response_model=ContactWithPhones)
 async def create_contact(
     contact: ContactCreate,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)]
 ):
     """Create a new contact entry."""
     # Ensure the contact is created for the current user
     if contact.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to create contacts for other users")
     
-    db_contact = Contact.model_validate(contact)
+    change_seq = await touch_contacts(session, current_user.id)
+    db_contact = Contact.model_validate(contact, update={"change_seq": change_seq})
     session.add(db_contact)
     await session.commit()
     await session.refresh(db_contact)
+    await response_cache.invalidate(current_user.id)
 
-    return db_contact
+    # A new contact has no phones yet; no need to load the relationship
+    return ContactWithPhones(**db_contact.model_dump(), phones=[])
 
 
-@router.put("/{contact_id}", response_model=Contact)
+@router.put("/{contact_id}", response_model=ContactWithPhones)
 async def update_contact(
     contact_id: uuid.UUID,
     contact: Contact,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Update a contact by ID."""
-    db_contact = await session.get(Contact, contact_id)
+    """Update a contact by ID; with If-Match only if its ETag still matches."""
+    version = if_match_versions(if_match, 1)
+    # Update only if the contact belongs to the current user
+    db_contact = await update_owned_contact(session, contact_id, current_user.id, version=version and version[0], name=contact.name, email=contact.email)
     if not db_contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
-    # Verify the contact belongs to the current user
-    if db_contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this contact")
-
-    db_contact.name = contact.name
-    db_contact.email = contact.email
+        await _missing_or_changed(session, contact_id, current_user.id, version)
 
+    phones = (await session.exec(select(Phone).where(Phone.contact_id == contact_id))).all()
     await session.commit()
-    await session.refresh(db_contact)
+    await response_cache.invalidate(current_user.id)
 
-    return db_contact
+    # The version goes out in the ETag only, as on read_contact
+    body = ContactWithPhones(**db_contact.model_dump(), phones=phones)
+    return JSONResponse(body.model_dump(mode="json"), headers=etag_headers(row_etag(db_contact.version)))
 
 
 @router.delete("/{contact_id}")
 async def delete_contact(
     contact_id: uuid.UUID,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Delete a contact by ID."""
-    db_contact = await session.get(Contact, contact_id)
-    if not db_contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
-    # Verify the contact belongs to the current user
-    if db_contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this contact")
+    """Delete a contact by ID; with If-Match only if its ETag still matches."""
+    version = if_match_versions(if_match, 1)
+    # Delete only if the contact belongs to the current user
+    if not await delete_owned_contact(session, contact_id, current_user.id, version=version and version[0]):
+        await _missing_or_changed(session, contact_id, current_user.id, version)
 
-    await session.delete(db_contact)
     await session.commit()
+    await response_cache.invalidate(current_user.id)
 
     return {"detail": "Contact deleted successfully"}
 
 
-@router.post("/upload-vcf")
+@router.post("/{contact_id}/merge", response_model=ContactWithPhones)
+async def merge_contacts(
+    contact_id: uuid.UUID,
+    merge: ContactMerge,
+    session: Annotated[Session, Depends(get_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+):
+    """Merge other contacts into this one in one transaction.
+
+    Their phones move over, except numbers this contact already has, a missing
+    email is taken from them, and they are deleted.
+    """
+    if contact_id in merge.contact_ids:
+        raise HTTPException(status_code=400, detail="Cannot merge a contact into itself")
+
+    if not await dedup.merge_contacts(session, current_user.id, contact_id, merge.contact_ids):
+        raise HTTPException(status_code=404, detail="Contact not found")
+    await session.commit()
+    await response_cache.invalidate(current_user.id)
+
+    return await get_owned_contact(session, contact_id, current_user.id, options=load_profile("contact_with_phones"))
+
+
+async def _missing_or_changed(session: Session, contact_id: uuid.UUID, user_id: uuid.UUID, version: tuple[int, ...] | None):
+    """Raise 412 if a conditional write failed on a stale version, else 404."""
+    if version is not None and await get_owned_contact_version(session, contact_id, user_id) is not None:
+        raise HTTPException(status_code=412, detail="Contact was modified")
+    raise HTTPException(status_code=404, detail="Contact not found")
+
+
+@router.post("/upload-vcf", response_model=ImportJobPublic, status_code=202)
 async def upload_vcf(
     file: Annotated[UploadFile, File(...)],
     user_id: Annotated[str, Form(...)],
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)]
 ):
-    """Upload a VCF file and create contacts with phone numbers."""
+    """Upload a VCF file and queue a job creating contacts with phone numbers.
+
+    The import runs in the background; poll /contacts/imports/{job_id} for progress.
+    """
     # Verify the user can only upload for themselves
     if str(current_user.id) != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to upload contacts for other users")
@@ -125,125 +408,27 @@ async def upload_vcf(
     if not file.filename.endswith(('.vcf', '.vcard')):
         raise HTTPException(status_code=400, detail="Only .vcf or .vcard files are supported")
     
+    job_id = uuid.uuid4()
     try:
-        # Read file content
-        content = await file.read()
-        try:
-            vcf_text = content.decode('utf-8')
-        except UnicodeDecodeError:
-            # Try with different encoding if UTF-8 fails
-            vcf_text = content.decode('latin-1')
-        
-        # Parse VCF file with error handling
-        contacts_created = 0
-        contacts_skipped = 0
-        errors = []
-        
-        # Split the VCF file into individual vCard entries
-        vcard_blocks = []
-        current_block = []
-        for line in vcf_text.split('\n'):
-            if line.strip().startswith('BEGIN:VCARD'):
-                current_block = [line]
-            elif line.strip().startswith('END:VCARD'):
-                current_block.append(line)
-                vcard_blocks.append('\n'.join(current_block))
-                current_block = []
-            elif current_block:
-                current_block.append(line)
-        
-        # Process each vCard block individually
-        for vcard_text in vcard_blocks:
-            try:
-                # Try to parse this vCard
-                vcard = vobject.readOne(vcard_text)
-                
-                # Extract name
-                name = ""
-                if hasattr(vcard, 'fn'):
-                    name = vcard.fn.value
-                elif hasattr(vcard, 'n'):
-                    name_parts = vcard.n.value
-                    name = f"{name_parts.given} {name_parts.family}".strip()
-                
-                if not name:
-                    contacts_skipped += 1
-                    continue  # Skip entries without a name
-                
-                # Extract email
-                email = None
-                if hasattr(vcard, 'email'):
-                    email = vcard.email.value if hasattr(vcard.email, 'value') else str(vcard.email)
-                
-                # Check if contact already exists (same name and email for this user)
-                existing_query = select(Contact).where(
-                    Contact.user_id == uuid.UUID(user_id),
-                    Contact.name == name
-                )
-                if email:
-                    existing_query = existing_query.where(Contact.email == email)
-                
-                result = await session.exec(existing_query)
-                existing_contact = result.first()
-                
-                if existing_contact:
-                    # Contact already exists, skip it
-                    contacts_skipped += 1
-                    continue
-                
-                # Create contact
-                contact_data = ContactCreate(
-                    name=name,
-                    email=email,
-                    user_id=uuid.UUID(user_id)
-                )
-                db_contact = Contact.model_validate(contact_data)
-                session.add(db_contact)
-                await session.flush()  # Get the contact ID before committing
-                
-                # Extract and add phone numbers
-                if hasattr(vcard, 'tel_list'):
-                    for tel in vcard.tel_list:
-                        try:
-                            phone_number = tel.value
-                            # Try to get the phone type
-                            phone_type = None
-                            if hasattr(tel, 'type_param'):
-                                phone_type = tel.type_param.lower() if tel.type_param else None
-                            
-                            phone_data = PhoneCreate(
-                                number=phone_number,
-                                number_type=phone_type,
-                                contact_id=db_contact.id
-                            )
-                            db_phone = Phone.model_validate(phone_data)
-                            session.add(db_phone)
-                        except Exception as phone_error:
-                            # Skip invalid phone numbers but continue with the contact
-                            errors.append(f"Skipped invalid phone for {name}: {str(phone_error)}")
-                            continue
-                
-                contacts_created += 1
-            
-            except Exception as contact_error:
-                # Skip this contact but continue with others
-                contacts_skipped += 1
-                errors.append(f"Skipped contact: {str(contact_error)[:100]}")
-                continue
-        
-        await session.commit()
-        
-        result = {
-            "message": "VCF file processed successfully",
-            "count": contacts_created,
-            "skipped": contacts_skipped
-        }
-        
-        if errors:
-            result["warnings"] = errors[:10]  # Return first 10 errors to avoid huge response
-        
-        return result
-    
-    except Exception as e:
-        await session.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to process VCF file: {str(e)}")
+        path = await spool_upload(file, job_id)
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store VCF file: {str(e)}")
+
+    job = ImportJob(id=job_id, user_id=current_user.id, filename=file.filename, path=path)
+    await import_queue.submit(job)
+
+    return job
+
+
+@router.get("/imports/{job_id}", response_model=ImportJobPublic)
+async def read_import_job(
+    job_id: uuid.UUID,
+    current_user: Annotated[UserPublic, Depends(get_current_user)]
+):
+    """Get the progress of a VCF import job."""
+    job = await import_queue.get(job_id)
+    # Another user's job is reported missing, so job ids cannot be probed
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    return job
@@ -1,10 +1,14 @@
 from fastapi import APIRouter
 from fastapi import status, HTTPException, Depends
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
-from app.models import User, UserBase, UserBaseWithContact, UserCreate, UserLogin, TokenResponse, TokenRefresh, TokenBlacklist
-from app.api.deps import decode_token, hash_password, get_current_user, verify_password, create_access_token, create_refresh_token, decode_token
+from app.models import Contact, User, UserBase, UserBaseWithContact, UserCreate, UserLogin, UserPublic, TokenResponse, TokenRefresh
+from app.api.deps import decode_token, get_current_user, create_access_token, create_refresh_token, decode_token
+from app.passwords import hash_password, verify_password
+from app.revocation import revocation_store, token_key
 from app.db import get_session
+from datetime import datetime, timezone
 from typing import Annotated
 
 router = APIRouter(
@@ -35,10 +39,18 @@ async def register(session: Annotated[Session, Depends(get_session)], user: User
         )
     
     # Hash password and store user
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
     session.add(db_user)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent registration won the race for the unique username/email
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
     await session.refresh(db_user)
     
     return db_user
@@ -50,11 +62,17 @@ async def login(session: Annotated[Session, Depends(get_session)], user: UserLog
     # Verify user credentials
     result = await session.exec(select(User).where(User.username == user.username))
     db_user = result.first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    valid, new_hash = await verify_password(user.password, db_user.hashed_password if db_user else None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
+
+    # Upgrade legacy SHA-256 hashes and outdated Argon2 parameters
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await session.commit()
     
     # Create tokens
     access_token = create_access_token(data={"sub": user.username})
@@ -70,7 +88,6 @@ async def login(session: Annotated[Session, Depends(get_session)], user: UserLog
 async def refresh_token(token_data: TokenRefresh):
     """Get new access token using refresh token."""
     # Verify refresh token
-    print(f"Refreshing token: {token_data.refresh_token}")
     payload = decode_token(token_data.refresh_token)
     
     # Check if it's a refresh token
@@ -79,6 +96,13 @@ async def refresh_token(token_data: TokenRefresh):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type"
         )
+
+    # Check if it was revoked by a logout (in memory, no query)
+    if revocation_store.is_revoked(token_key(token_data.refresh_token, payload)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
     
     username: str = payload.get("sub")
     if username is None:
@@ -98,20 +122,21 @@ async def refresh_token(token_data: TokenRefresh):
 
 
 @router.post("/logout")
-async def logout(session: Annotated[Session, Depends(get_session)], token_data: TokenRefresh):
+async def logout(token_data: TokenRefresh):
     """Logout and invalidate refresh token."""
     # Decode the refresh token
     payload = decode_token(token_data.refresh_token)
 
-    # Blacklist the token
-    blacklisted_token = TokenBlacklist(token=token_data.refresh_token)
-    session.add(blacklisted_token)
-    await session.commit()
+    # Revoke the token until it expires
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+    await revocation_store.revoke(token_key(token_data.refresh_token, payload), expires_at)
 
     return {"detail": "Successfully logged out"}
 
 
 @router.get("/users/me", response_model=UserBaseWithContact)
-async def read_users_me(current_user: Annotated[User, Depends(get_current_user)]):
+async def read_users_me(session: Annotated[Session, Depends(get_session)], current_user: Annotated[UserPublic, Depends(get_current_user)]):
     """Get current user information (protected route)."""
-    return current_user
+    result = await session.exec(select(Contact).where(Contact.user_id == current_user.id))
+
+    return UserBaseWithContact(**current_user.model_dump(), contacts=result.all())
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import tuple_
 from sqlmodel import Session, select
 from typing import Annotated
 from app.db import get_session
-from app.models import Phone, PhoneBase, PhoneWithContact, PhoneCreate, User, Contact
-from app.api.deps import get_current_user
+from app.models import Phone, PhoneBase, PhonePublic, PhoneWithContact, PhoneCreate, UserPublic, Contact
+from app.api.deps import get_current_user, get_read_session
+from app import response_cache
+from app.api.conditional import collection_etag, etag_headers, if_match_versions, none_match, not_modified, row_etag
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_keyset, encode_cursor
+from app.crud import create_owned_phone, delete_owned_phone, get_contacts_version, get_owned_phone, get_owned_phone_version, update_owned_phone
+from app.load_profiles import load_profile
+from app.phone_numbers import lookup_keys, query_digits
 
 import uuid
 
@@ -15,90 +22,141 @@ router = APIRouter(
 )
 
 
-@router.get("/")
+@router.get("/", response_model=list[PhonePublic])
 async def read_phones(
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    request: Request,
+    response: Response,
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE, description=f"Page size, {DEFAULT_PAGE_SIZE} by default")] = DEFAULT_PAGE_SIZE,
+    cursor: Annotated[str | None, Query(description="Opaque cursor from the X-Next-Cursor header")] = None,
+    number_type: Annotated[str | None, Query(description="Only phones of this type")] = None,
+    number: Annotated[str | None, Query(description="Only numbers whose digits start with these, in any format")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Endpoint to read phones for the authenticated user's contacts.
+
+    Phones are ordered by (number, id) and paginated with a keyset cursor
+    returned in the X-Next-Cursor header. A response holds at most `limit`
+    phones (DEFAULT_PAGE_SIZE when not given); to read every phone, follow the
+    cursor until a response has no X-Next-Cursor. The ETag follows the user's
+    contacts version, as in read_contacts.
+    """
+    etag = collection_etag(await get_contacts_version(session, current_user.id), request.url.query)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+
+    query = (
+        select(Phone.id, Phone.number, Phone.number_type, Phone.contact_id)
+        .join(Contact, Contact.id == Phone.contact_id)
+        .where(Contact.user_id == current_user.id)
+    )
+    if number_type:
+        query = query.where(Phone.number_type == number_type)
+    if number:
+        digits = query_digits(number)
+        if not digits:
+            raise HTTPException(status_code=422, detail="number must contain digits")
+        query = query.where(Phone.number_digits.startswith(digits))
+    if cursor:
+        after_number, after_id = decode_keyset(cursor)
+        query = query.where(tuple_(Phone.number, Phone.id) > tuple_(after_number, after_id))
+
+    result = await session.exec(query.order_by(Phone.number, Phone.id).limit(limit + 1))
+    phones = result.all()
+    if len(phones) > limit:
+        phones = phones[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(phones[-1].number, phones[-1].id)
+
+    return [dict(phone._mapping) for phone in phones]
+
+
+@router.get("/lookup", response_model=list[PhoneWithContact])
+async def lookup_phone(
+    number: Annotated[str, Query(min_length=1, max_length=50, description="Phone number in any common format")],
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
 ):
-    """Endpoint to read phones for the authenticated user's contacts."""
-    # Get all contacts for the current user
-    result = await session.exec(select(Contact).where(Contact.user_id == current_user.id))
-    user_contacts = result.all()
-    contact_ids = [contact.id for contact in user_contacts]
-    
-    # Get all phones for those contacts
-    if contact_ids:
-        result = await session.exec(select(Phone).where(Phone.contact_id.in_(contact_ids)))
-        phones = result.all()
-    else:
-        phones = []
-
-    return phones
+    """Reverse lookup: find the user's contacts that have this phone number.
+
+    The number is normalized the same way as stored numbers and matched on
+    the indexed number_digits column.
+    """
+    try:
+        keys = lookup_keys(number)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    result = await session.exec(
+        select(Phone)
+        .join(Contact, Contact.id == Phone.contact_id)
+        .where(Contact.user_id == current_user.id, Phone.number_digits.in_(keys))
+        .options(*load_profile("phone_with_contact"))
+    )
+    return result.all()
 
 
 @router.get("/{phone_id}", response_model=PhoneWithContact)
 async def read_phone(
     phone_id: uuid.UUID,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    response: Response,
+    session: Annotated[Session, Depends(get_read_session)],
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Get phone by ID, including associated contact information."""
-    phone = await session.get(Phone, phone_id)
+    """Get phone by ID, including associated contact information.
+
+    The ETag combines the phone and contact versions, since both are in the body.
+    """
+    if if_none_match:
+        versions = await get_owned_phone_version(session, phone_id, current_user.id)
+        if versions is not None and none_match(if_none_match, row_etag(*versions)):
+            return not_modified(row_etag(*versions))
+
+    phone = await get_owned_phone(session, phone_id, current_user.id, options=load_profile("phone_with_contact"))
     if not phone:
         raise HTTPException(status_code=404, detail="Phone not found")
-    
-    # Get the contact to verify ownership
-    contact = await session.get(Contact, phone.contact_id)
-    if not contact or contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to access this phone")
 
+    response.headers.update(etag_headers(row_etag(phone.version, phone.contact.version)))
     return phone
 
 
-@router.post("/", response_model=Phone)
+@router.post("/", response_model=PhonePublic)
 async def create_phone(
     phone: PhoneCreate,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)]
 ):
     """Create a new phone entry."""
-    # Verify the contact belongs to the current user
-    contact = await session.get(Contact, phone.contact_id)
-    if not contact:
+    # Insert only if the contact belongs to the current user
+    db_phone = await create_owned_phone(session, phone, current_user.id)
+    if not db_phone:
         raise HTTPException(status_code=404, detail="Contact not found")
-    
-    if contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to add phones to this contact")
-    
-    db_phone = Phone.model_validate(phone)
-    session.add(db_phone)
+
     await session.commit()
-    await session.refresh(db_phone)
+    await response_cache.invalidate(current_user.id)
 
     return db_phone
 
 
-@router.put("/{phone_id}", response_model=Phone)
+@router.put("/{phone_id}", response_model=PhonePublic)
 async def update_phone(
     phone_id: uuid.UUID,
     phone: PhoneCreate,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Update a phone by ID."""
-    db_phone = await session.get(Phone, phone_id)
+    """Update a phone by ID; with If-Match only if its ETag still matches."""
+    versions = if_match_versions(if_match, 2)
+    # Update only if the phone's contact belongs to the current user
+    db_phone = await update_owned_phone(session, phone_id, current_user.id, version=versions, number=phone.number, number_type=phone.number_type)
     if not db_phone:
-        raise HTTPException(status_code=404, detail="Phone not found")
-    
-    # Verify the phone's contact belongs to the current user
-    contact = await session.get(Contact, db_phone.contact_id)
-    if not contact or contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this phone")
-    
-    db_phone.number = phone.number
-    db_phone.number_type = phone.number_type
+        await _missing_or_changed(session, phone_id, current_user.id, versions)
+
     await session.commit()
-    await session.refresh(db_phone)
+    await response_cache.invalidate(current_user.id)
 
     return db_phone
 
@@ -107,19 +165,23 @@ async def update_phone(
 async def delete_phone(
     phone_id: uuid.UUID,
     session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[UserPublic, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Delete a phone by ID."""
-    phone = await session.get(Phone, phone_id)
-    if not phone:
-        raise HTTPException(status_code=404, detail="Phone not found")
-    
-    # Verify the phone's contact belongs to the current user
-    contact = await session.get(Contact, phone.contact_id)
-    if not contact or contact.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this phone")
+    """Delete a phone by ID; with If-Match only if its ETag still matches."""
+    versions = if_match_versions(if_match, 2)
+    # Delete only if the phone's contact belongs to the current user
+    if not await delete_owned_phone(session, phone_id, current_user.id, version=versions):
+        await _missing_or_changed(session, phone_id, current_user.id, versions)
 
-    await session.delete(phone)
     await session.commit()
+    await response_cache.invalidate(current_user.id)
+
+    return {"detail": "Phone deleted successfully"}
+
 
-    return {"detail": "Phone deleted successfully"}
\ No newline at end of file
+async def _missing_or_changed(session: Session, phone_id: uuid.UUID, user_id: uuid.UUID, versions: tuple[int, ...] | None):
+    """Raise 412 if a conditional write failed on a stale version, else 404."""
+    if versions is not None and await get_owned_phone_version(session, phone_id, user_id) is not None:
+        raise HTTPException(status_code=412, detail="Phone was modified")
+    raise HTTPException(status_code=404, detail="Phone not found")
@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import render_metrics
 
 router = APIRouter(
     prefix="/utils",
@@ -9,3 +12,9 @@ router = APIRouter(
 @router.get("/health-check")
 async def health_check():
     return {"status": "ok"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: route latency, DB time and query counts per request."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
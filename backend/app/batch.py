@@ -0,0 +1,203 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, delete, insert, literal, union_all, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud import touch_contacts
+from app.models import BatchOperation, BatchResult, Contact, Phone, Tombstone
+from app.phone_numbers import number_digits
+
+# Rows one batch may write, counting the phones nested in contact creates
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "500"))
+
+# A batch is applied as a whole or not at all. It takes the user row lock
+# (app.crud.touch_contacts) before anything else, so no other write can change
+# the user's contacts between its checks and its writes. It is then checked:
+# required fields, conflicting operations, and ownership of every referenced
+# contact and phone in one query. Only then are the writes issued, one statement per kind
+# of write whatever the batch size, under a single change sequence number
+# (see app.crud), for the caller to commit once.
+
+_REQUIRED = {
+    ("create", "contact"): ("name",),
+    ("update", "contact"): ("id", "name"),
+    ("delete", "contact"): ("id",),
+    ("create", "phone"): ("contact_id", "number"),
+    ("update", "phone"): ("id", "number"),
+    ("delete", "phone"): ("id",),
+}
+
+
+def batch_rows(operations: list[BatchOperation]) -> int:
+    return sum(1 + len(op.phones) for op in operations)
+
+
+def _check_fields(op: BatchOperation) -> str | None:
+    missing = [field for field in _REQUIRED[op.action, op.kind] if getattr(op, field) is None]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    if op.phones and (op.action, op.kind) != ("create", "contact"):
+        return "Nested phones are only accepted when creating a contact"
+    return None
+
+
+async def _owned(session: AsyncSession, user_id: uuid.UUID, contact_ids: set, phone_ids: set) -> tuple[set, dict]:
+    """Which of the ids the user owns: contact ids, and phone id -> contact id."""
+    queries = []
+    if contact_ids:
+        queries.append(
+            select(literal("contact").label("kind"), Contact.id.label("id"), Contact.id.label("contact_id"))
+            .where(Contact.id.in_(contact_ids), Contact.user_id == user_id)
+        )
+    if phone_ids:
+        queries.append(
+            select(literal("phone").label("kind"), Phone.id.label("id"), Phone.contact_id.label("contact_id"))
+            .join(Contact, Contact.id == Phone.contact_id)
+            .where(Phone.id.in_(phone_ids), Contact.user_id == user_id)
+        )
+    if not queries:
+        return set(), {}
+
+    result = await session.exec(union_all(*queries) if len(queries) > 1 else queries[0])
+    contacts, phones = set(), {}
+    for kind, object_id, contact_id in result.all():
+        if kind == "contact":
+            contacts.add(object_id)
+        else:
+            phones[object_id] = contact_id
+    return contacts, phones
+
+
+async def _validate(session: AsyncSession, user_id: uuid.UUID, operations: list[BatchOperation]) -> tuple[dict[int, tuple[int, str]], dict]:
+    """Errors by operation index as (status, message), empty when the batch can be
+    applied, and the contact of each phone the batch changes."""
+    errors = {index: (422, error) for index, op in enumerate(operations) if (error := _check_fields(op))}
+
+    contact_ids = {op.id for op in operations if op.kind == "contact" and op.id} | {
+        op.contact_id for op in operations if op.kind == "phone" and op.action == "create" and op.contact_id
+    }
+    phone_ids = {op.id for op in operations if op.kind == "phone" and op.action != "create" and op.id}
+    owned_contacts, owned_phones = await _owned(session, user_id, contact_ids, phone_ids)
+
+    deleted_contacts = {op.id for op in operations if (op.action, op.kind) == ("delete", "contact")}
+    targets = set()
+    for index, op in enumerate(operations):
+        if index in errors or op.action == "create" and op.kind == "contact":
+            continue
+        if op.kind == "contact":
+            target, parent = ("contact", op.id), op.id
+            found = op.id in owned_contacts
+        elif op.action == "create":
+            target, parent = None, op.contact_id
+            found = op.contact_id in owned_contacts
+        else:
+            target, parent = ("phone", op.id), owned_phones.get(op.id)
+            found = op.id in owned_phones
+
+        if not found:
+            errors[index] = (404, f"{'Contact' if op.kind == 'contact' or op.action == 'create' else 'Phone'} not found")
+        elif target in targets:
+            errors[index] = (409, "Already changed by another operation of this batch")
+        elif op.kind == "phone" and parent in deleted_contacts:
+            errors[index] = (409, "Its contact is deleted by this batch")
+        if target:
+            targets.add(target)
+    return errors, owned_phones
+
+
+async def apply_batch(session: AsyncSession, user_id: uuid.UUID, operations: list[BatchOperation]) -> tuple[bool, list[BatchResult]]:
+    """Apply create/update/delete operations on the user's contacts and phones in one transaction.
+
+    Returns whether the batch was applied and one result per operation. When
+    any operation fails nothing is written: failed operations report why and
+    the others 424. The caller commits an applied batch; like the app.crud
+    helpers, a batch not applied leaves a pending version bump, so the caller
+    must not commit it.
+    """
+    # Lock first: validation must see the rows the writes below will change
+    change_seq = await touch_contacts(session, user_id)
+    errors, phone_contacts = await _validate(session, user_id, operations)
+    if errors:
+        return False, [
+            BatchResult(index=index, status=errors[index][0], error=errors[index][1])
+            if index in errors else BatchResult(index=index, status=424, error="Batch not applied")
+            for index in range(len(operations))
+        ]
+
+    now = datetime.now(timezone.utc)
+    results: list[BatchResult] = []
+    new_contacts, new_phones, tombstones = [], [], []
+    contact_updates, phone_updates = [], []
+    deleted_contacts, deleted_phones = [], []
+    touched_contacts = set()
+
+    for index, op in enumerate(operations):
+        if op.action == "create" and op.kind == "contact":
+            contact_id = uuid.uuid4()
+            phones = [
+                {"id": uuid.uuid4(), "number": phone.number, "number_digits": number_digits(phone.number), "number_type": phone.number_type, "contact_id": contact_id}
+                for phone in op.phones
+            ]
+            new_contacts.append({"id": contact_id, "name": op.name, "email": op.email, "user_id": user_id, "change_seq": change_seq})
+            new_phones += phones
+            results.append(BatchResult(index=index, status=201, id=contact_id, phone_ids=[phone["id"] for phone in phones]))
+        elif op.action == "create":
+            phone_id = uuid.uuid4()
+            new_phones.append({"id": phone_id, "number": op.number, "number_digits": number_digits(op.number), "number_type": op.number_type, "contact_id": op.contact_id})
+            touched_contacts.add(op.contact_id)
+            results.append(BatchResult(index=index, status=201, id=phone_id))
+        elif op.action == "update" and op.kind == "contact":
+            contact_updates.append({"b_id": op.id, "b_name": op.name, "b_email": op.email})
+            results.append(BatchResult(index=index, status=200, id=op.id))
+        elif op.action == "update":
+            phone_updates.append({"b_id": op.id, "b_number": op.number, "b_digits": number_digits(op.number), "b_type": op.number_type})
+            touched_contacts.add(phone_contacts[op.id])
+            results.append(BatchResult(index=index, status=200, id=op.id))
+        else:
+            if op.kind == "contact":
+                deleted_contacts.append(op.id)
+            else:
+                deleted_phones.append(op.id)
+                touched_contacts.add(phone_contacts[op.id])
+            tombstones.append({"id": uuid.uuid4(), "user_id": user_id, "kind": op.kind, "object_id": op.id, "change_seq": change_seq, "deleted_at": now})
+            results.append(BatchResult(index=index, status=204, id=op.id))
+
+    # Contacts whose phones changed; updated ones get their version bumped below anyway
+    touched_contacts -= {update["b_id"] for update in contact_updates} | set(deleted_contacts)
+
+    if new_contacts:
+        await session.exec(insert(Contact).values(new_contacts))
+    if new_phones:
+        await session.exec(insert(Phone).values(new_phones))
+    if contact_updates:
+        contacts = Contact.__table__
+        await session.exec(
+            update(contacts)
+            .where(contacts.c.id == bindparam("b_id"))
+            .values(name=bindparam("b_name"), email=bindparam("b_email"), version=contacts.c.version + 1, change_seq=change_seq, updated_at=now),
+            params=contact_updates,
+        )
+    if phone_updates:
+        phones = Phone.__table__
+        await session.exec(
+            update(phones)
+            .where(phones.c.id == bindparam("b_id"))
+            .values(number=bindparam("b_number"), number_digits=bindparam("b_digits"), number_type=bindparam("b_type"), version=phones.c.version + 1, updated_at=now),
+            params=phone_updates,
+        )
+    if deleted_phones:
+        await session.exec(delete(Phone).where(Phone.id.in_(deleted_phones)))
+    if deleted_contacts:
+        await session.exec(delete(Contact).where(Contact.id.in_(deleted_contacts)))
+    if touched_contacts:
+        await session.exec(
+            update(Contact)
+            .where(Contact.id.in_(touched_contacts))
+            .values(version=Contact.version + 1, change_seq=change_seq, updated_at=now)
+        )
+    if tombstones:
+        await session.exec(insert(Tombstone).values(tombstones))
+    return True, results
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import delete, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.crud import get_contacts_version
+from app.db import async_session_maker
+from app.models import Contact, Phone, Tombstone
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+TOMBSTONE_PURGE_INTERVAL = float(os.getenv("TOMBSTONE_PURGE_INTERVAL", "3600"))
+
+logger = logging.getLogger(__name__)
+
+# Delta sync. Each write to a user's contacts takes the next value of
+# user.contacts_version as its change sequence number (app.crud), stamped on
+# the changed contact (contact.change_seq, also for phone changes) and on
+# tombstones of deleted contacts and phones. The user row lock serializes a
+# user's writes, so once sequence number N is committed every smaller one is
+# too, and a sync never skips a change.
+#
+# A cursor holds the position (change_seq, contact id) within the changes
+# already sent and when it was issued. Cursors older than the tombstone
+# retention answer 410 so the client falls back to a full download.
+
+
+def _decode_since(since: str) -> tuple[int, uuid.UUID | None]:
+    change_seq, contact_id, issued_at = decode_cursor(since, 3)
+    try:
+        position = int(change_seq), uuid.UUID(contact_id) if contact_id else None
+        issued_at = float(issued_at)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if issued_at < time.time() - TOMBSTONE_RETENTION_DAYS * 86400:
+        raise HTTPException(status_code=410, detail="Cursor expired, download all contacts again")
+    return position
+
+
+def _cursor(change_seq: int, contact_id: uuid.UUID | None) -> str:
+    return encode_cursor(change_seq, contact_id and str(contact_id), time.time())
+
+
+async def read_changes(session: AsyncSession, user_id: uuid.UUID, since: str | None, limit: int) -> dict:
+    """Contacts changed and rows deleted after the `since` cursor, in change order.
+
+    Without a cursor every contact is returned and no tombstones.
+    """
+    after_seq, after_id = _decode_since(since) if since else (-1, None)
+
+    # Only changes up to the version committed now; later ones go to the next sync
+    upto_seq = await get_contacts_version(session, user_id)
+
+    query = select(Contact.id, Contact.name, Contact.email, Contact.user_id, Contact.change_seq).where(
+        Contact.user_id == user_id, Contact.change_seq <= upto_seq
+    )
+    if after_id is None:
+        query = query.where(Contact.change_seq > after_seq)
+    else:
+        query = query.where(tuple_(Contact.change_seq, Contact.id) > tuple_(after_seq, after_id))
+
+    result = await session.exec(query.order_by(Contact.change_seq, Contact.id).limit(limit + 1))
+    contacts = result.all()
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+    if has_more:
+        # Resume inside the last sequence number; its tombstones go out now
+        upto_seq, cursor = contacts[-1].change_seq, _cursor(contacts[-1].change_seq, contacts[-1].id)
+    else:
+        cursor = _cursor(upto_seq, None)
+
+    phones: dict[uuid.UUID, list[dict]] = {}
+    if contacts:
+        phone_result = await session.exec(
+            select(Phone.id, Phone.number, Phone.number_type, Phone.contact_id)
+            .where(Phone.contact_id.in_([contact.id for contact in contacts]))
+        )
+        for phone in phone_result.all():
+            phones.setdefault(phone.contact_id, []).append(dict(phone._mapping))
+
+    deleted: dict[str, list[uuid.UUID]] = {"contact": [], "phone": []}
+    if since:
+        tombstone_result = await session.exec(
+            select(Tombstone.kind, Tombstone.object_id)
+            .where(Tombstone.user_id == user_id, Tombstone.change_seq > after_seq, Tombstone.change_seq <= upto_seq)
+            .order_by(Tombstone.change_seq)
+        )
+        for kind, object_id in tombstone_result.all():
+            deleted[kind].append(object_id)
+
+    return {
+        "contacts": [
+            {"id": c.id, "name": c.name, "email": c.email, "user_id": c.user_id, "phones": phones.get(c.id, [])}
+            for c in contacts
+        ],
+        "deleted_contacts": deleted["contact"],
+        "deleted_phones": deleted["phone"],
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+async def purge_tombstones():
+    """Delete tombstones older than the retention period."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    async with async_session_maker() as session:
+        await session.exec(delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+        await session.commit()
+
+
+async def purge_tombstones_forever():
+    """Background task purging old tombstones every TOMBSTONE_PURGE_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(TOMBSTONE_PURGE_INTERVAL)
+        try:
+            await purge_tombstones()
+        except Exception:
+            logger.exception("Tombstone purge failed")
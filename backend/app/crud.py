@@ -0,0 +1,181 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Sequence
+
+from sqlalchemy import String, Uuid, delete, exists, insert, literal, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Contact, Phone, PhoneCreate, Tombstone, User
+from app.phone_numbers import number_digits
+from app.replicas import replica_pool
+
+# Data access helpers that resolve a resource and check its owner in a single
+# statement. A missing row and a row owned by another user both come back as
+# None, so callers answer 404 in either case.
+#
+# Writes also maintain the versions behind ETags: the row's own version, the
+# parent contact's version for phone changes, and the user's contacts_version
+# for any change to their contacts or phones. Passing `version` makes a write
+# conditional on the current version (If-Match).
+#
+# Every write starts by bumping contacts_version, which locks the user row and
+# yields the change sequence number stamped on the changed contact and on
+# tombstones of deleted rows (see app.changes). When a helper reports nothing
+# written the bump is still pending, so callers must not commit.
+
+
+def _owns_phone(user_id: uuid.UUID, contact_version: int | None = None):
+    conditions = [Contact.id == Phone.contact_id, Contact.user_id == user_id]
+    if contact_version is not None:
+        conditions.append(Contact.version == contact_version)
+    return exists().where(*conditions)
+
+
+async def get_contacts_version(session: AsyncSession, user_id: uuid.UUID) -> int:
+    result = await session.exec(select(User.contacts_version).where(User.id == user_id))
+    return result.first() or 0
+
+
+async def touch_contacts(session: AsyncSession, user_id: uuid.UUID) -> int:
+    """Record that the user's contacts or phones changed; returns the new change sequence number.
+
+    Also pins the user's reads to the primary until a while after the commit
+    (app.replicas).
+    """
+    replica_pool.pin_on_commit(session, user_id)
+    result = await session.exec(
+        update(User)
+        .where(User.id == user_id)
+        .values(contacts_version=User.contacts_version + 1)
+        .returning(User.contacts_version)
+    )
+    return result.scalar_one()
+
+
+async def _touch_contact(session: AsyncSession, contact_id: uuid.UUID, change_seq: int):
+    await session.exec(
+        update(Contact)
+        .where(Contact.id == contact_id)
+        .values(version=Contact.version + 1, change_seq=change_seq, updated_at=datetime.now(timezone.utc))
+    )
+
+
+async def _add_tombstone(session: AsyncSession, user_id: uuid.UUID, kind: str, object_id: uuid.UUID, change_seq: int):
+    await session.exec(
+        insert(Tombstone).values(id=uuid.uuid4(), user_id=user_id, kind=kind, object_id=object_id, change_seq=change_seq, deleted_at=datetime.now(timezone.utc))
+    )
+
+
+async def get_owned_contact(session: AsyncSession, contact_id: uuid.UUID, user_id: uuid.UUID, options: Sequence = ()) -> Contact | None:
+    result = await session.exec(
+        select(Contact).where(Contact.id == contact_id, Contact.user_id == user_id).options(*options)
+    )
+    return result.first()
+
+
+async def get_owned_contact_version(session: AsyncSession, contact_id: uuid.UUID, user_id: uuid.UUID) -> int | None:
+    result = await session.exec(select(Contact.version).where(Contact.id == contact_id, Contact.user_id == user_id))
+    return result.first()
+
+
+async def update_owned_contact(session: AsyncSession, contact_id: uuid.UUID, user_id: uuid.UUID, version: int | None = None, **values) -> Contact | None:
+    change_seq = await touch_contacts(session, user_id)
+    query = update(Contact).where(Contact.id == contact_id, Contact.user_id == user_id)
+    if version is not None:
+        query = query.where(Contact.version == version)
+
+    result = await session.exec(
+        query.values(version=Contact.version + 1, change_seq=change_seq, updated_at=datetime.now(timezone.utc), **values)
+        .returning(Contact)
+    )
+    return result.scalar_one_or_none()
+
+
+async def delete_owned_contact(session: AsyncSession, contact_id: uuid.UUID, user_id: uuid.UUID, version: int | None = None) -> bool:
+    change_seq = await touch_contacts(session, user_id)
+    query = delete(Contact).where(Contact.id == contact_id, Contact.user_id == user_id)
+    if version is not None:
+        query = query.where(Contact.version == version)
+
+    result = await session.exec(query.returning(Contact.id))
+    if result.first() is None:
+        return False
+    await _add_tombstone(session, user_id, "contact", contact_id, change_seq)
+    return True
+
+
+async def get_owned_phone(session: AsyncSession, phone_id: uuid.UUID, user_id: uuid.UUID, options: Sequence = ()) -> Phone | None:
+    """Load a phone joined to its contact; the "phone_with_contact" profile fills `contact` from the join."""
+    result = await session.exec(
+        select(Phone)
+        .join(Contact, Contact.id == Phone.contact_id)
+        .where(Phone.id == phone_id, Contact.user_id == user_id)
+        .options(*options)
+    )
+    return result.first()
+
+
+async def get_owned_phone_version(session: AsyncSession, phone_id: uuid.UUID, user_id: uuid.UUID) -> tuple[int, int] | None:
+    """The (phone, contact) versions making up a phone's ETag."""
+    result = await session.exec(
+        select(Phone.version, Contact.version)
+        .join(Contact, Contact.id == Phone.contact_id)
+        .where(Phone.id == phone_id, Contact.user_id == user_id)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def create_owned_phone(session: AsyncSession, phone: PhoneCreate, user_id: uuid.UUID) -> Phone | None:
+    """Insert a phone only if its contact belongs to the user (INSERT ... SELECT)."""
+    change_seq = await touch_contacts(session, user_id)
+    source = select(
+        literal(uuid.uuid4(), Uuid),
+        literal(phone.number, String),
+        literal(number_digits(phone.number), String),
+        literal(phone.number_type, String),
+        Contact.id,
+    ).where(Contact.id == phone.contact_id, Contact.user_id == user_id)
+
+    result = await session.exec(
+        insert(Phone)
+        .from_select(["id", "number", "number_digits", "number_type", "contact_id"], source)
+        .returning(Phone)
+    )
+    db_phone = result.scalar_one_or_none()
+    if db_phone:
+        await _touch_contact(session, db_phone.contact_id, change_seq)
+    return db_phone
+
+
+async def update_owned_phone(session: AsyncSession, phone_id: uuid.UUID, user_id: uuid.UUID, version: tuple[int, int] | None = None, **values) -> Phone | None:
+    """Update a phone; `version` is the (phone, contact) pair from the phone's ETag."""
+    if "number" in values:
+        values["number_digits"] = number_digits(values["number"])
+
+    change_seq = await touch_contacts(session, user_id)
+    query = update(Phone).where(Phone.id == phone_id, _owns_phone(user_id, version and version[1]))
+    if version is not None:
+        query = query.where(Phone.version == version[0])
+
+    result = await session.exec(query.values(version=Phone.version + 1, updated_at=datetime.now(timezone.utc), **values).returning(Phone))
+    db_phone = result.scalar_one_or_none()
+    if db_phone:
+        await _touch_contact(session, db_phone.contact_id, change_seq)
+    return db_phone
+
+
+async def delete_owned_phone(session: AsyncSession, phone_id: uuid.UUID, user_id: uuid.UUID, version: tuple[int, int] | None = None) -> bool:
+    change_seq = await touch_contacts(session, user_id)
+    query = delete(Phone).where(Phone.id == phone_id, _owns_phone(user_id, version and version[1]))
+    if version is not None:
+        query = query.where(Phone.version == version[0])
+
+    result = await session.exec(query.returning(Phone.contact_id))
+    contact_id = result.scalar_one_or_none()
+    if contact_id is None:
+        return False
+    await _touch_contact(session, contact_id, change_seq)
+    await _add_tombstone(session, user_id, "phone", phone_id, change_seq)
+    return True
@@ -0,0 +1,235 @@
+import os
+import re
+import unicodedata
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, delete, func, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud import touch_contacts
+from app.models import Contact, ContactKey, Phone, Tombstone, User
+
+# Contacts sharing more than this many keys of one value (a shared office
+# number, a very common name) are not clustered on that key
+DEDUP_MAX_BLOCK = int(os.getenv("DEDUP_MAX_BLOCK", "50"))
+DEDUP_BATCH_SIZE = 1000
+
+# Duplicate detection by blocking: every contact gets a few normalized keys
+# (contactkey table) and contacts sharing a key are candidates. Clusters are
+# the connected components over shared keys, found in one indexed pass over
+# the user's repeated keys, so the cost grows with the number of contacts
+# rather than the number of pairs.
+#
+# Keys are refreshed lazily. user.dedup_seq is the contacts_version the keys
+# were built at; since every write stamps the changed contact with its change
+# sequence number (app.crud), contacts with a larger change_seq are exactly the
+# ones whose keys are stale. Deleted contacts lose their keys by cascade, and
+# clusters are joined back to live contacts anyway.
+
+_SOUNDEX = {letter: digit for digit, letters in {
+    "1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r",
+}.items() for letter in letters}
+
+
+def soundex(word: str) -> str:
+    """American Soundex code of a lowercase ASCII word, e.g. "john" -> "J500"."""
+    code, last = word[0].upper(), _SOUNDEX.get(word[0])
+    for letter in word[1:]:
+        digit = _SOUNDEX.get(letter)
+        if digit and digit != last:
+            code += digit
+        if letter not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def name_key(name: str | None) -> str | None:
+    """Phonetic key of a name, independent of word order and accents."""
+    folded = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    words = re.findall(r"[a-z]+", folded)
+    if not words:
+        return None
+    return " ".join(sorted({soundex(word) for word in words}))[:100]
+
+
+def email_key(email: str | None) -> str | None:
+    """Local part of an email, lowercased and without a +tag."""
+    local, at, _ = (email or "").partition("@")
+    local = local.split("+", 1)[0].strip().lower()
+    return local[:100] if at and local else None
+
+
+def contact_keys(name: str | None, email: str | None, digits: list[str]) -> set[tuple[str, str]]:
+    keys = {("phone", value) for value in digits if value}
+    if key := name_key(name):
+        keys.add(("name", key))
+    if key := email_key(email):
+        keys.add(("email", key))
+    return keys
+
+
+async def _key_state(session: AsyncSession, user_id: uuid.UUID, lock: bool = False):
+    query = select(User.contacts_version, User.dedup_seq).where(User.id == user_id)
+    if lock:
+        query = query.with_for_update()
+    return (await session.exec(query)).first()
+
+
+async def refresh_keys(session: AsyncSession, user_id: uuid.UUID):
+    """Rebuild the keys of the user's contacts changed since the last refresh.
+
+    Up-to-date keys are detected without a lock. A rebuild takes the user row
+    lock, which keeps writes and other refreshes out until it commits.
+    """
+    row = await _key_state(session, user_id)
+    if row is None or row.dedup_seq >= row.contacts_version:
+        return
+
+    # Another refresh may have finished while we waited for the lock
+    row = await _key_state(session, user_id, lock=True)
+    if row.dedup_seq >= row.contacts_version:
+        await session.commit()
+        return
+
+    result = await session.exec(
+        select(Contact.id, Contact.name, Contact.email, Phone.number_digits)
+        .outerjoin(Phone, Phone.contact_id == Contact.id)
+        .where(Contact.user_id == user_id, Contact.change_seq > row.dedup_seq)
+    )
+    changed: dict[uuid.UUID, tuple] = {}
+    for contact_id, name, email, digits in result.all():
+        changed.setdefault(contact_id, (name, email, []))[2].append(digits)
+
+    contact_ids = list(changed)
+    for start in range(0, len(contact_ids), DEDUP_BATCH_SIZE):
+        await session.exec(delete(ContactKey).where(ContactKey.contact_id.in_(contact_ids[start:start + DEDUP_BATCH_SIZE])))
+
+    keys = [
+        {"contact_id": contact_id, "kind": kind, "value": value, "user_id": user_id}
+        for contact_id, (name, email, digits) in changed.items()
+        for kind, value in contact_keys(name, email, digits)
+    ]
+    for start in range(0, len(keys), DEDUP_BATCH_SIZE):
+        await session.exec(insert(ContactKey).values(keys[start:start + DEDUP_BATCH_SIZE]))
+
+    await session.exec(update(User).where(User.id == user_id).values(dedup_seq=row.contacts_version))
+    await session.commit()
+
+
+class _Clusters:
+    """Union-find over contact ids."""
+
+    def __init__(self):
+        self.parent: dict[uuid.UUID, uuid.UUID] = {}
+
+    def find(self, item: uuid.UUID) -> uuid.UUID:
+        root = self.parent.setdefault(item, item)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: uuid.UUID, b: uuid.UUID):
+        self.parent[self.find(a)] = self.find(b)
+
+
+async def find_duplicates(session: AsyncSession, user_id: uuid.UUID, limit: int) -> list[dict]:
+    """Clusters of the user's contacts sharing a dedup key, largest first."""
+    await refresh_keys(session, user_id)
+
+    blocks = (
+        select(ContactKey.kind, ContactKey.value)
+        .where(ContactKey.user_id == user_id)
+        .group_by(ContactKey.kind, ContactKey.value)
+        .having(func.count() > 1, func.count() <= DEDUP_MAX_BLOCK)
+        .subquery()
+    )
+    result = await session.exec(
+        select(ContactKey.kind, ContactKey.value, ContactKey.contact_id)
+        .join(blocks, and_(blocks.c.kind == ContactKey.kind, blocks.c.value == ContactKey.value))
+        .where(ContactKey.user_id == user_id)
+        .order_by(ContactKey.kind, ContactKey.value)
+    )
+
+    clusters = _Clusters()
+    block_members: dict[tuple[str, str], list[uuid.UUID]] = {}
+    for kind, value, contact_id in result.all():
+        members = block_members.setdefault((kind, value), [])
+        if members:
+            clusters.union(contact_id, members[0])
+        else:
+            clusters.find(contact_id)
+        members.append(contact_id)
+    if not clusters.parent:
+        return []
+
+    matched_on: dict[uuid.UUID, set[str]] = {}
+    for (kind, _), members in block_members.items():
+        matched_on.setdefault(clusters.find(members[0]), set()).add(kind)
+
+    result = await session.exec(
+        select(Contact.id, Contact.name, Contact.email, Contact.user_id)
+        .where(Contact.id.in_(list(clusters.parent)), Contact.user_id == user_id)
+        .order_by(Contact.name, Contact.id)
+    )
+    members_by_root: dict[uuid.UUID, list[dict]] = {}
+    for contact in result.all():
+        members_by_root.setdefault(clusters.find(contact.id), []).append(dict(contact._mapping))
+
+    found = [
+        {"contacts": members, "matched_on": sorted(matched_on[root])}
+        for root, members in members_by_root.items()
+        if len(members) > 1
+    ]
+    found.sort(key=lambda cluster: (-len(cluster["contacts"]), cluster["contacts"][0]["name"]))
+    return found[:limit]
+
+
+async def merge_contacts(session: AsyncSession, user_id: uuid.UUID, target_id: uuid.UUID, source_ids: list[uuid.UUID]) -> Contact | None:
+    """Fold the source contacts into the target: move their phones, fill a missing
+    email, and delete them. Phones whose number the target already has are
+    dropped. Returns None unless the user owns every contact; like the app.crud
+    helpers it then leaves a pending version bump, so the caller must not commit.
+    """
+    source_ids = list(dict.fromkeys(source_ids))
+    ids = [target_id, *source_ids]
+    change_seq = await touch_contacts(session, user_id)
+    result = await session.exec(
+        select(Contact.id, Contact.email).where(Contact.id.in_(ids), Contact.user_id == user_id)
+    )
+    emails = dict(result.all())
+    if len(emails) != len(ids):
+        return None
+
+    now = datetime.now(timezone.utc)
+
+    result = await session.exec(select(Phone.id, Phone.contact_id, Phone.number_digits).where(Phone.contact_id.in_(ids)))
+    phones = sorted(result.all(), key=lambda phone: phone.contact_id != target_id)
+    seen, moved, dropped = set(), [], []
+    for phone in phones:
+        if phone.contact_id != target_id:
+            (dropped if phone.number_digits in seen else moved).append(phone.id)
+        if phone.number_digits:
+            seen.add(phone.number_digits)
+
+    if moved:
+        await session.exec(
+            update(Phone).where(Phone.id.in_(moved)).values(contact_id=target_id, version=Phone.version + 1, updated_at=now)
+        )
+    if dropped:
+        await session.exec(delete(Phone).where(Phone.id.in_(dropped)))
+    await session.exec(delete(Contact).where(Contact.id.in_(source_ids)))
+    await session.exec(insert(Tombstone).values([
+        {"id": uuid.uuid4(), "user_id": user_id, "kind": kind, "object_id": object_id, "change_seq": change_seq, "deleted_at": now}
+        for kind, object_ids in (("contact", source_ids), ("phone", dropped))
+        for object_id in object_ids
+    ]))
+
+    values = {"version": Contact.version + 1, "change_seq": change_seq, "updated_at": now}
+    if emails[target_id] is None:
+        values["email"] = next((emails[source_id] for source_id in source_ids if emails[source_id]), None)
+    result = await session.exec(update(Contact).where(Contact.id == target_id).values(**values).returning(Contact))
+    return result.scalar_one()
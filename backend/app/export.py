@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import os
+import uuid
+import zlib
+from typing import AsyncIterable, AsyncIterator, Callable
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Contact, Phone
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", str(64 * 1024)))
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+GZIP_LEVEL = 6
+
+# Exports stream straight from a server-side cursor: rows are fetched
+# EXPORT_FETCH_SIZE at a time, each contact is serialized as soon as its
+# phones are read, and the text is sent in chunks of about EXPORT_CHUNK_SIZE
+# bytes, optionally gzipped on the fly. Memory stays flat for any number of
+# contacts and the first bytes go out after the first fetch.
+
+CSV_COLUMNS = ("id", "name", "email", "phones")
+
+
+async def iter_contacts(session: AsyncSession, user_id: uuid.UUID) -> AsyncIterator[tuple]:
+    """Yield (contact, phones) for every contact of the user, ordered by (name, id)."""
+    query = (
+        select(Contact.id, Contact.name, Contact.email, Phone.number, Phone.number_type)
+        .outerjoin(Phone, Phone.contact_id == Contact.id)
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.name, Contact.id)
+    )
+    result = await session.stream(query.execution_options(yield_per=EXPORT_FETCH_SIZE))
+
+    current = None
+    phones: list[tuple[str, str | None]] = []
+    try:
+        async for row in result:
+            if current is not None and row.id != current.id:
+                yield current, phones
+                phones = []
+            current = row
+            if row.number is not None:
+                phones.append((row.number, row.number_type))
+        if current is not None:
+            yield current, phones
+    finally:
+        await result.close()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Fold a content line into pieces of at most 75 octets (RFC 6350)."""
+    if len(line.encode()) <= 75:
+        return line
+    pieces, piece, size = [], "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            pieces.append(piece)
+            # Continuation lines start with a space, which counts too
+            piece, size = " ", 1
+        piece += char
+        size += width
+    pieces.append(piece)
+    return "\r\n".join(pieces)
+
+
+def _type_param(number_type: str) -> str:
+    return "".join(char for char in number_type if char not in ',;:"').strip()
+
+
+def to_vcard(contact, phones: list[tuple[str, str | None]]) -> str:
+    """Serialize a contact as a vCard 3.0 that upload_vcf imports back."""
+    lines = [
+        "BEGIN:VCARD",
+        "VERSION:3.0",
+        f"UID:{contact.id}",
+        f"FN:{_escape(contact.name)}",
+        f"N:{_escape(contact.name)};;;;",
+    ]
+    if contact.email:
+        lines.append(f"EMAIL;TYPE=INTERNET:{_escape(contact.email)}")
+    for number, number_type in phones:
+        param = number_type and _type_param(number_type)
+        lines.append(f"TEL;TYPE={param}:{_escape(number)}" if param else f"TEL:{_escape(number)}")
+    lines.append("END:VCARD")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def to_jsonl(contact, phones: list[tuple[str, str | None]]) -> str:
+    return json.dumps({
+        "id": str(contact.id),
+        "name": contact.name,
+        "email": contact.email,
+        "phones": [{"number": number, "number_type": number_type} for number, number_type in phones],
+    }) + "\n"
+
+
+class _CsvRows:
+    """Serialize contacts as CSV rows, reusing one writer and buffer."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def row(self, values) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+    def __call__(self, contact, phones: list[tuple[str, str | None]]) -> str:
+        numbers = "; ".join(f"{number} ({number_type})" if number_type else number for number, number_type in phones)
+        return self.row((contact.id, contact.name, contact.email or "", numbers))
+
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "vcf": ("text/vcard; charset=utf-8", "vcf"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "x-gzip"):
+            quality = params.strip().removeprefix("q=")
+            try:
+                return not params or float(quality) > 0
+            except ValueError:
+                return False
+    return False
+
+
+async def export_text(session: AsyncSession, user_id: uuid.UUID, export_format: str) -> AsyncIterator[str]:
+    """Yield the serialized contacts of the user in `export_format`, one contact at a time."""
+    serialize: Callable[..., str]
+    if export_format == "vcf":
+        serialize = to_vcard
+    elif export_format == "jsonl":
+        serialize = to_jsonl
+    else:
+        serialize = _CsvRows()
+        yield serialize.row(CSV_COLUMNS)
+
+    async for contact, phones in iter_contacts(session, user_id):
+        yield serialize(contact, phones)
+
+
+async def encode_chunks(texts: AsyncIterable[str], gzip: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Join text pieces into UTF-8 chunks of about `chunk_size` bytes, gzipped if asked."""
+    compressor = zlib.compressobj(GZIP_LEVEL, wbits=31) if gzip else None
+    pending: list[bytes] = []
+    size = 0
+    async for text in texts:
+        data = text.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
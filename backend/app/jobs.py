@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+import anyio
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.db import async_session_maker
+from app.models import ImportJob
+from app.vcf import ImportReport, import_vcards, iter_vcards, read_chunks
+
+IMPORT_QUEUE_BACKEND = os.getenv("IMPORT_QUEUE_BACKEND", "memory")
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+IMPORT_POLL_INTERVAL = float(os.getenv("IMPORT_POLL_INTERVAL", "1.0"))
+# Running jobs report every IMPORT_HEARTBEAT_INTERVAL seconds; a job silent for
+# IMPORT_STALE_SECONDS lost its worker and is marked failed by the next sweep,
+# which also runs every IMPORT_HEARTBEAT_INTERVAL seconds
+IMPORT_HEARTBEAT_INTERVAL = float(os.getenv("IMPORT_HEARTBEAT_INTERVAL", "30"))
+IMPORT_STALE_SECONDS = float(os.getenv("IMPORT_STALE_SECONDS", "300"))
+IMPORT_MEMORY_RETENTION = 1000
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "contact-imports"))
+
+logger = logging.getLogger(__name__)
+
+
+async def spool_upload(file, job_id: uuid.UUID) -> str:
+    """Copy an uploaded file to the spool directory shared with the workers."""
+    os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_SPOOL_DIR, f"{job_id}.vcf")
+    async with await anyio.open_file(path, "wb") as out:
+        async for chunk in read_chunks(file):
+            await out.write(chunk)
+    return path
+
+
+class ImportQueue(ABC):
+    """Base class of the import job queues: a backend plus a pool of workers."""
+
+    def __init__(self):
+        self._workers: list[asyncio.Task] = []
+
+    @abstractmethod
+    async def submit(self, job: ImportJob):
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: uuid.UUID) -> ImportJob | None:
+        ...
+
+    @abstractmethod
+    async def claim(self) -> ImportJob:
+        """Wait for the next queued job and mark it as running."""
+
+    @abstractmethod
+    async def save(self, job: ImportJob):
+        ...
+
+    async def heartbeat(self, job: ImportJob):
+        """Record that the worker running `job` is alive."""
+
+    async def start(self, workers: int = IMPORT_WORKERS):
+        for _ in range(workers):
+            self._workers.append(asyncio.create_task(self._work()))
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self):
+        while True:
+            job = await self.claim()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Import job %s crashed", job.id)
+
+    async def _beat(self, job: ImportJob):
+        while True:
+            await asyncio.sleep(IMPORT_HEARTBEAT_INTERVAL)
+            try:
+                await self.heartbeat(job)
+            except Exception:
+                logger.exception("Heartbeat of import job %s failed", job.id)
+
+    async def _run(self, job: ImportJob):
+        report = ImportReport()
+        beat = asyncio.create_task(self._beat(job))
+
+        async def progress(report: ImportReport):
+            job.cards_parsed = report.parsed
+            job.contacts_created = report.created
+            job.contacts_skipped = report.skipped
+            job.warnings = list(report.warnings)
+            await self.save(job)
+
+        try:
+            async with async_session_maker() as session:
+                async with await anyio.open_file(job.path, "rb") as file:
+                    await import_vcards(session, job.user_id, iter_vcards(read_chunks(file)), report=report, on_batch=progress)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"Failed to process VCF file: {str(e)}"[:255]
+        finally:
+            beat.cancel()
+            await progress(report)
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+
+class MemoryImportQueue(ImportQueue):
+    """In-process queue; jobs are lost on restart and only visible to this worker."""
+
+    def __init__(self):
+        super().__init__()
+        self._jobs: dict[uuid.UUID, ImportJob] = {}
+        self._pending: asyncio.Queue[uuid.UUID] = asyncio.Queue()
+
+    async def start(self, workers: int = IMPORT_WORKERS):
+        # An asyncio.Queue is bound to the event loop that first waits on it;
+        # make a new one in case the app runs again in another loop
+        self._pending = asyncio.Queue()
+        for job in self._jobs.values():
+            if job.status == "queued":
+                self._pending.put_nowait(job.id)
+        await super().start(workers)
+
+    async def submit(self, job: ImportJob):
+        if len(self._jobs) >= IMPORT_MEMORY_RETENTION:
+            # Forget the oldest finished jobs so the registry stays bounded
+            finished = [job_id for job_id, known in self._jobs.items() if known.status in ("done", "failed")]
+            for job_id in finished[:len(finished) // 2 or 1]:
+                del self._jobs[job_id]
+        self._jobs[job.id] = job
+        await self._pending.put(job.id)
+
+    async def get(self, job_id: uuid.UUID) -> ImportJob | None:
+        return self._jobs.get(job_id)
+
+    async def claim(self) -> ImportJob:
+        job = self._jobs[await self._pending.get()]
+        job.status = "running"
+        return job
+
+    async def save(self, job: ImportJob):
+        # Jobs are live objects, nothing to persist
+        pass
+
+
+class DatabaseImportQueue(ImportQueue):
+    """Queue stored in the importjob table, shared by every API and worker process.
+
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so they can run
+    in dedicated processes (`python -m app.jobs`) as long as they share the
+    spool directory with the API. Running jobs carry a heartbeat, and every
+    process running workers looks for stale jobs once per heartbeat interval;
+    one whose worker died is marked failed. It is not run again, as its first
+    batches of contacts are already committed.
+    """
+
+    async def start(self, workers: int = IMPORT_WORKERS):
+        await super().start(workers)
+        self._workers.append(asyncio.create_task(self._sweep()))
+
+    async def _sweep(self):
+        while True:
+            try:
+                await self.fail_stale()
+            except Exception:
+                logger.exception("Sweep for stale import jobs failed")
+            await asyncio.sleep(IMPORT_HEARTBEAT_INTERVAL)
+
+    async def submit(self, job: ImportJob):
+        async with async_session_maker() as session:
+            session.add(job)
+            await session.commit()
+
+    async def get(self, job_id: uuid.UUID) -> ImportJob | None:
+        async with async_session_maker() as session:
+            return await session.get(ImportJob, job_id)
+
+    async def claim(self) -> ImportJob:
+        while True:
+            async with async_session_maker() as session:
+                result = await session.exec(
+                    select(ImportJob)
+                    .where(ImportJob.status == "queued")
+                    .order_by(ImportJob.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                job = result.first()
+                if job:
+                    job.status = "running"
+                    job.heartbeat_at = datetime.now(timezone.utc)
+                    session.add(job)
+                    await session.commit()
+                    return job
+            await asyncio.sleep(IMPORT_POLL_INTERVAL)
+
+    async def save(self, job: ImportJob):
+        async with async_session_maker() as session:
+            await session.exec(
+                update(ImportJob)
+                .where(ImportJob.id == job.id)
+                .values(
+                    status=job.status,
+                    cards_parsed=job.cards_parsed,
+                    contacts_created=job.contacts_created,
+                    contacts_skipped=job.contacts_skipped,
+                    warnings=job.warnings,
+                    error=job.error,
+                    heartbeat_at=datetime.now(timezone.utc),
+                )
+            )
+            await session.commit()
+
+    async def heartbeat(self, job: ImportJob):
+        async with async_session_maker() as session:
+            await session.exec(
+                update(ImportJob)
+                .where(ImportJob.id == job.id, ImportJob.status == "running")
+                .values(heartbeat_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+
+    async def fail_stale(self, stale_seconds: float = IMPORT_STALE_SECONDS) -> list[uuid.UUID]:
+        """Mark running jobs without a recent heartbeat as failed; returns their ids."""
+        async with async_session_maker() as session:
+            result = await session.exec(
+                update(ImportJob)
+                .where(
+                    ImportJob.status == "running",
+                    ImportJob.heartbeat_at < datetime.now(timezone.utc) - timedelta(seconds=stale_seconds),
+                )
+                .values(status="failed", error="The import worker stopped before finishing")
+                .returning(ImportJob.id, ImportJob.path)
+            )
+            stale = result.all()
+            await session.commit()
+
+        for job_id, path in stale:
+            logger.warning("Import job %s lost its worker, marked failed", job_id)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return [job_id for job_id, _ in stale]
+
+
+def create_import_queue(backend: str = IMPORT_QUEUE_BACKEND) -> ImportQueue:
+    if backend == "memory":
+        return MemoryImportQueue()
+    if backend == "database":
+        return DatabaseImportQueue()
+    raise ValueError(f"Unknown import queue backend: {backend}")
+
+
+import_queue = create_import_queue()
+
+
+async def run_workers(workers: int = IMPORT_WORKERS):
+    """Run import workers until cancelled, for dedicated worker processes."""
+    await import_queue.start(workers)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await import_queue.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_workers())
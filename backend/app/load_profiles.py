@@ -0,0 +1,20 @@
+from sqlalchemy.orm import contains_eager, selectinload
+
+from app.models import Contact, Phone
+
+# Relationships are declared with lazy="raise", so nothing is loaded unless a
+# router asks for it. Each profile is the list of loader options for one
+# endpoint shape; touching a relationship outside its profile raises instead
+# of silently issuing extra queries.
+LOAD_PROFILES = {
+    # Columns only, e.g. for ownership checks and mutations
+    "bare": [],
+    "contact_with_phones": [selectinload(Contact.phones)],
+    # Fills Phone.contact from a query that already joins Contact (see app.crud)
+    "phone_with_contact": [contains_eager(Phone.contact)],
+}
+
+
+def load_profile(name: str) -> list:
+    """Return the loader options of a named profile."""
+    return LOAD_PROFILES[name]
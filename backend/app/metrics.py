@@ -0,0 +1,195 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestStats:
+    """Database activity of the request being served."""
+    queries: int = 0
+    db_time: float = 0.0
+    slow_queries: list[str] = field(default_factory=list)
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def _labels(key: tuple[tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """A Prometheus style histogram with labels, rendered in text format."""
+
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series: dict[tuple[tuple[str, str], ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(key, le=str(bound))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {count}")
+            lines.append(f"{self.name}_sum{_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(key)} {value}")
+        return lines
+
+
+class CacheStats:
+    """Hit, miss and size gauges of the registered in-process caches."""
+
+    def __init__(self):
+        self._caches: dict[str, object] = {}
+
+    def register(self, name: str, cache):
+        self._caches[name] = cache
+
+    def render(self) -> list[str]:
+        families = [
+            ("cache_hits_total", "counter", "Cache lookups that found an entry.", lambda cache: cache.hits),
+            ("cache_misses_total", "counter", "Cache lookups that found nothing.", lambda cache: cache.misses),
+            ("cache_entries", "gauge", "Entries currently cached.", len),
+            ("cache_hit_ratio", "gauge", "Share of cache lookups that found an entry.", lambda cache: cache.hits / ((cache.hits + cache.misses) or 1)),
+        ]
+        lines = []
+        for name, kind, documentation, value in families:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+            for cache_name, cache in sorted(self._caches.items()):
+                lines.append(f'{name}{{cache="{cache_name}"}} {value(cache)}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency per route.", LATENCY_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL statements per request.", LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements issued per request.", QUERY_COUNT_BUCKETS)
+SLOW_QUERIES = Counter("db_slow_queries_total", f"SQL statements slower than {SLOW_QUERY_MS:g} ms.")
+CACHES = CacheStats()
+
+METRICS = [REQUEST_LATENCY, REQUEST_DB_TIME, REQUEST_QUERIES, SLOW_QUERIES, CACHES]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Attach statement timing to an engine, accounted to the current request.
+
+    The start time lives on the statement's execution context, which is
+    dropped with it when the statement fails.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "metrics_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            SLOW_QUERIES.inc()
+            if stats is not None:
+                stats.slow_queries.append(statement)
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and per-request DB usage.
+
+    The DB totals so far are also sent in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = (time.perf_counter() - start) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                    f"app;dur={elapsed:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = {"method": scope["method"], "route": route}
+            REQUEST_LATENCY.observe(time.perf_counter() - start, status=str(status_code), **labels)
+            REQUEST_DB_TIME.observe(stats.db_time, **labels)
+            REQUEST_QUERIES.observe(stats.queries, **labels)
@@ -1,18 +1,30 @@
 from sqlmodel import SQLModel, Field, Relationship
-from pydantic import EmailStr
+from sqlalchemy import Column, DDL, DateTime, Index, JSON, event, text
+from pydantic import EmailStr, field_validator
+from datetime import datetime, timezone
+from typing import Literal
 import uuid
 
+from app.phone_numbers import normalize_number
+
 
 class UserBase(SQLModel):
-    username: str = Field(default=None, index=True, max_length=50)
-    email: EmailStr = Field(default=None, index=True, max_length=100)
+    username: str = Field(default=None, index=True, unique=True, max_length=50)
+    email: EmailStr = Field(default=None, index=True, unique=True, max_length=100)
 
 
+# Relationships never load implicitly (lazy="raise"); routers apply a named
+# profile from app.load_profiles instead.
 class User(UserBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str = Field(default=None, max_length=256)
-    security_qas: list["SecurityQA"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}, cascade_delete=True)
-    contacts: list["Contact"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}, cascade_delete=True)
+    # Bumped by every change to the user's contacts or phones; collection ETags
+    contacts_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # contacts_version up to which the dedup keys are current (app.dedup); -1
+    # until the first refresh, which then keys contacts with change_seq 0 too
+    dedup_seq: int = Field(default=-1, sa_column_kwargs={"server_default": "-1"})
+    security_qas: list["SecurityQA"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "raise"}, cascade_delete=True, passive_deletes=True)
+    contacts: list["Contact"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "raise"}, cascade_delete=True, passive_deletes=True)
 
 
 class UserPublic(UserBase):
@@ -43,12 +55,12 @@ class UserCreate(UserBase):
 class SecurityQABase(SQLModel):
     question: str = Field(default=None, index=True, max_length=255)
     answer: str = Field(default=None, max_length=255)
-    user_id: uuid.UUID | None = Field(default=None, foreign_key="user.id", ondelete="CASCADE")
+    user_id: uuid.UUID | None = Field(default=None, foreign_key="user.id", ondelete="CASCADE", index=True)
 
 
 class SecurityQA(SecurityQABase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
-    user: User | None = Relationship(back_populates="security_qas", sa_relationship_kwargs={"lazy": "joined"})
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user: User | None = Relationship(back_populates="security_qas", sa_relationship_kwargs={"lazy": "raise"})
 
 
 class SecurityQAWithUser(SecurityQABase):
@@ -66,10 +78,35 @@ class ContactBase(SQLModel):
     user_id: uuid.UUID | None = Field(default=None, foreign_key="user.id", ondelete="CASCADE")
 
 
+# Composite indexes follow the list queries: contacts are listed per user in
+# (name, id) keyset order, phones are fetched per contact. The primary keys
+# need no extra index.
 class Contact(ContactBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
-    user: User | None = Relationship(back_populates="contacts", sa_relationship_kwargs={"lazy": "joined"})
-    phones: list["Phone"] = Relationship(back_populates="contact", sa_relationship_kwargs={"lazy": "selectin"}, cascade_delete=True)
+    __table_args__ = (
+        Index("ix_contact_user_id_name_id", "user_id", "name", "id", postgresql_include=["email"]),
+        Index("ix_contact_user_id_change_seq", "user_id", "change_seq", "id"),
+        # Search indexes (app.search), PostgreSQL only
+        Index("ix_contact_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_contact_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_contact_search_tsv",
+            text("to_tsvector('simple'::regconfig, name || ' ' || coalesce(email, ''))"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Bumped when the contact or one of its phones changes; row ETags
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
+    # User's contacts_version at the last change of the contact or its phones
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    user: User | None = Relationship(back_populates="contacts", sa_relationship_kwargs={"lazy": "raise"})
+    phones: list["Phone"] = Relationship(back_populates="contact", sa_relationship_kwargs={"lazy": "raise"}, cascade_delete=True, passive_deletes=True)
+
+
+# The trigram indexes need pg_trgm, also when create_all builds the schema
+event.listen(Contact.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
 
 
 class ContactWithPhones(ContactBase):
@@ -81,15 +118,33 @@ class ContactCreate(ContactBase):
     pass
 
 
+class ContactSearchResult(ContactBase):
+    id: uuid.UUID
+    score: float
+
+
 class PhoneBase(SQLModel):
-    number: str = Field(default=None, max_length=20)
+    number: str = Field(default=None, max_length=32)
     number_type: str | None = Field(default=None, max_length=50)
     contact_id: uuid.UUID | None = Field(default=None, foreign_key="contact.id", ondelete="CASCADE")
 
 
 class Phone(PhoneBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
-    contact: Contact | None = Relationship(back_populates="phones", sa_relationship_kwargs={"lazy": "joined"})
+    __table_args__ = (
+        Index("ix_phone_contact_id_number_id", "contact_id", "number", "id", postgresql_include=["number_type"]),
+        Index("ix_phone_number_digits_trgm", "number_digits", postgresql_using="gin", postgresql_ops={"number_digits": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Digits of the normalized number, for indexed reverse lookup
+    number_digits: str | None = Field(default=None, max_length=20, index=True)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
+    contact: Contact | None = Relationship(back_populates="phones", sa_relationship_kwargs={"lazy": "raise"})
+
+
+class PhonePublic(PhoneBase):
+    id: uuid.UUID
 
 
 class PhoneWithContact(PhoneBase):
@@ -98,7 +153,10 @@ class PhoneWithContact(PhoneBase):
 
 
 class PhoneCreate(PhoneBase):
-    pass
+    @field_validator("number")
+    @classmethod
+    def normalize(cls, value: str) -> str:
+        return normalize_number(value)
 
 
 class TokenResponse(SQLModel):
@@ -112,5 +170,146 @@ class TokenRefresh(SQLModel):
 
 
 class TokenBlacklist(SQLModel, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
-    token: str = Field(index=True, unique=True)
\ No newline at end of file
+    """A revoked refresh token, identified by its jti claim (see app.revocation)."""
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    jti: str = Field(index=True, unique=True, max_length=64)
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    revoked_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True), index=True)
+
+
+class Tombstone(SQLModel, table=True):
+    """Record of a deleted contact or phone, kept for delta sync clients."""
+    __table_args__ = (
+        Index("ix_tombstone_user_id_change_seq", "user_id", "change_seq"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
+    kind: str = Field(max_length=20)
+    object_id: uuid.UUID
+    change_seq: int
+    deleted_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True), index=True)
+
+
+class ContactChanges(SQLModel):
+    contacts: list[ContactWithPhones] = []
+    deleted_contacts: list[uuid.UUID] = []
+    deleted_phones: list[uuid.UUID] = []
+    cursor: str
+    has_more: bool = False
+
+
+class ContactKey(SQLModel, table=True):
+    """Dedup blocking key of a contact: phonetic name, email local part or phone digits."""
+    __table_args__ = (
+        Index("ix_contactkey_user_id_kind_value", "user_id", "kind", "value", "contact_id"),
+    )
+
+    contact_id: uuid.UUID = Field(foreign_key="contact.id", ondelete="CASCADE", primary_key=True)
+    kind: str = Field(max_length=10, primary_key=True)
+    value: str = Field(max_length=100, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
+
+
+class DuplicateContact(ContactBase):
+    id: uuid.UUID
+
+
+class DuplicateCluster(SQLModel):
+    contacts: list[DuplicateContact]
+    # Kinds of key the contacts share: name, email, phone
+    matched_on: list[str]
+
+
+class ContactMerge(SQLModel):
+    contact_ids: list[uuid.UUID] = Field(min_length=1)
+
+
+class BatchPhone(SQLModel):
+    number: str = Field(max_length=32)
+    number_type: str | None = Field(default=None, max_length=50)
+
+    @field_validator("number")
+    @classmethod
+    def normalize(cls, value: str) -> str:
+        return normalize_number(value)
+
+
+class BatchOperation(SQLModel):
+    """One write of a /contacts/batch request.
+
+    Contacts: create takes name, email and phones; update takes id, name and
+    email; delete takes id. Phones: create takes contact_id, number and
+    number_type; update takes id, number and number_type; delete takes id.
+    """
+    action: Literal["create", "update", "delete"]
+    kind: Literal["contact", "phone"] = "contact"
+    id: uuid.UUID | None = None
+    contact_id: uuid.UUID | None = None
+    name: str | None = Field(default=None, max_length=100)
+    email: EmailStr | None = Field(default=None, max_length=100)
+    number: str | None = Field(default=None, max_length=32)
+    number_type: str | None = Field(default=None, max_length=50)
+    phones: list[BatchPhone] = []
+
+    @field_validator("number")
+    @classmethod
+    def normalize(cls, value: str | None) -> str | None:
+        return None if value is None else normalize_number(value)
+
+
+class BatchRequest(SQLModel):
+    operations: list[BatchOperation]
+
+
+class BatchResult(SQLModel):
+    index: int
+    status: int
+    id: uuid.UUID | None = None
+    phone_ids: list[uuid.UUID] = []
+    error: str | None = None
+
+
+class BatchResponse(SQLModel):
+    applied: bool
+    results: list[BatchResult]
+
+
+class ImportJobBase(SQLModel):
+    status: str = Field(default="queued", max_length=20)
+    filename: str | None = Field(default=None, max_length=255)
+    cards_parsed: int = 0
+    contacts_created: int = 0
+    contacts_skipped: int = 0
+    warnings: list[str] = Field(default_factory=list, sa_column=Column(JSON))
+    error: str | None = Field(default=None, max_length=255)
+
+
+class ImportJob(ImportJobBase, table=True):
+    # Workers claim the oldest queued job; finished jobs stay out of the index
+    __table_args__ = (
+        Index(
+            "ix_importjob_queued",
+            "created_at",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # Running jobs, checked for a stale heartbeat (app.jobs)
+        Index(
+            "ix_importjob_running",
+            "heartbeat_at",
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE", index=True)
+    path: str = Field(max_length=255)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
+    # Last sign of life of the worker running the job
+    heartbeat_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+
+
+class ImportJobPublic(ImportJobBase):
+    id: uuid.UUID
@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+# Argon2id cost, tuned per deployment: each hash takes memory_cost KiB and
+# roughly time_cost passes over it. Raising them rehashes users on login.
+PASSWORD_HASH_TIME_COST = int(os.getenv("PASSWORD_HASH_TIME_COST", "3"))
+PASSWORD_HASH_MEMORY_COST = int(os.getenv("PASSWORD_HASH_MEMORY_COST", "65536"))
+# One lane per hash; concurrency comes from the worker pool below
+PASSWORD_HASH_PARALLELISM = int(os.getenv("PASSWORD_HASH_PARALLELISM", "1"))
+# Hashes computed at once; more requests wait for a free worker
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Hashes from before Argon2: unsalted SHA-256 hex digests
+_LEGACY_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+password_hash = PasswordHash((
+    Argon2Hasher(
+        time_cost=PASSWORD_HASH_TIME_COST,
+        memory_cost=PASSWORD_HASH_MEMORY_COST,
+        parallelism=PASSWORD_HASH_PARALLELISM,
+    ),
+))
+
+# argon2-cffi releases the GIL, so a thread pool hashes in parallel while the
+# event loop keeps serving requests
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def _verify_and_update(password: str, hashed_password: str | None) -> tuple[bool, str | None]:
+    if hashed_password is None:
+        # Unknown user: spend the same time as a real check
+        password_hash.hash(password)
+        return False, None
+
+    if _LEGACY_SHA256.fullmatch(hashed_password):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        if not hmac.compare_digest(legacy, hashed_password):
+            return False, None
+        return True, password_hash.hash(password)
+
+    return password_hash.verify_and_update(password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with Argon2id in the password worker pool."""
+    return await _run(password_hash.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str | None) -> tuple[bool, str | None]:
+    """Check a password against a stored hash in the password worker pool.
+
+    Returns whether it matches and, when the stored hash is a legacy SHA-256
+    digest or uses outdated Argon2 parameters, a new hash to store.
+    """
+    return await _run(_verify_and_update, password, hashed_password)
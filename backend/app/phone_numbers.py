@@ -0,0 +1,75 @@
+import os
+import re
+
+# Country calling code assumed for numbers written without one, e.g. "880" or
+# "1". Leave empty to store such numbers as plain digits.
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "").lstrip("+")
+
+MIN_DIGITS = 3
+MAX_DIGITS = 15  # E.164 limit
+MAX_EXTENSION_DIGITS = 6
+
+_EXTENSION = re.compile(r"\s*(?:;ext=|ext\.?|extension|x|#)\s*(\d+)\s*$", re.IGNORECASE)
+_SEPARATORS = re.compile(r"[\s\-./()\[\]]")
+
+
+def normalize_number(raw: str) -> str:
+    """Return the canonical form of a phone number.
+
+    The canonical form is the number's digits, with the country code when it
+    is known, e.g. "15550102000" for both "+1 (555) 010-2000" and
+    "15550102000". An international prefix ("00" or "+") is dropped, and
+    national numbers get DEFAULT_COUNTRY_CODE in place of their trunk "0"
+    when it is configured. An extension is kept as ";ext=12". Raises
+    ValueError for anything that is not a phone number.
+    """
+    if raw is None:
+        raise ValueError("Phone number is required")
+
+    value = raw.strip()
+    extension = _EXTENSION.search(value)
+    if extension:
+        value = value[:extension.start()]
+    value = _SEPARATORS.sub("", value)
+    international = value.startswith(("+", "00"))
+    digits = value[1:] if value.startswith("+") else value[2:] if international else value
+    if not digits.isdigit():
+        raise ValueError(f"Invalid phone number: {raw!r}")
+
+    if not international and DEFAULT_COUNTRY_CODE:
+        if digits.startswith("0"):
+            digits = DEFAULT_COUNTRY_CODE + digits[1:]
+        elif not (digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) > 10):
+            digits = DEFAULT_COUNTRY_CODE + digits
+
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS:
+        raise ValueError(f"Invalid phone number length: {raw!r}")
+    if extension:
+        if len(extension.group(1)) > MAX_EXTENSION_DIGITS:
+            raise ValueError(f"Invalid phone extension: {raw!r}")
+        return f"{digits};ext={extension.group(1)}"
+    return digits
+
+
+def number_digits(number: str) -> str:
+    """The digits of a canonical number without its extension, as stored in Phone.number_digits."""
+    return number.split(";", 1)[0]
+
+
+def query_digits(q: str) -> str:
+    """The digits of a search fragment, to match against Phone.number_digits."""
+    return re.sub(r"\D", "", q)
+
+
+def lookup_keys(raw: str) -> list[str]:
+    """Digit strings a stored number may have when it matches `raw`.
+
+    Numbers saved before a country code was known are stored without one, so
+    a caller ID with the default country code also matches the national form.
+    """
+    digits = number_digits(normalize_number(raw))
+    keys = [digits]
+    if DEFAULT_COUNTRY_CODE and digits.startswith(DEFAULT_COUNTRY_CODE):
+        national = digits[len(DEFAULT_COUNTRY_CODE):]
+        keys += [national, "0" + national]
+    return keys
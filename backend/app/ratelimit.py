@@ -0,0 +1,178 @@
+import ipaddress
+import math
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.api.deps import decode_token
+from app.redis_client import get_redis
+
+# Quotas per route group as "<requests>/<seconds>", e.g. "120/60"; a bucket
+# holds up to <requests> tokens and refills at <requests>/<seconds> per
+# second. An empty value leaves the group unlimited.
+RATE_LIMITS = {
+    "auth": os.getenv("RATE_LIMIT_AUTH", ""),
+    "reads": os.getenv("RATE_LIMIT_READS", ""),
+    "writes": os.getenv("RATE_LIMIT_WRITES", ""),
+    "imports": os.getenv("RATE_LIMIT_IMPORTS", ""),
+}
+# memory keeps buckets per process; redis shares them between processes
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+def parse_limit(value: str) -> tuple[float, float] | None:
+    """(refill rate per second, burst) of a "<requests>/<seconds>" quota."""
+    if not value:
+        return None
+    requests, _, seconds = value.partition("/")
+    burst = float(requests)
+    return burst / float(seconds or 1), burst
+
+
+def route_group(method: str, path: str) -> str | None:
+    """Quota group of a request; None for requests that are never limited."""
+    if method == "OPTIONS" or path.startswith("/utils/"):
+        return None
+    if path.startswith("/auth/") and method == "POST":
+        return "auth"
+    if path == "/contacts/upload-vcf":
+        return "imports"
+    if method in ("GET", "HEAD"):
+        return "reads"
+    return "writes"
+
+
+def client_key(host: str) -> str:
+    """Rate limit key of a client address: IPv6 clients are counted per /64,
+    the smallest block a single subscriber is usually given."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if address.version == 6:
+        if address.ipv4_mapped:
+            return str(address.ipv4_mapped)
+        return str(ipaddress.IPv6Network((address, 64), strict=False))
+    return host
+
+
+class MemoryBuckets:
+    """Token buckets in a dict: a lookup, a few float operations and no I/O per request.
+
+    The least recently used buckets are dropped beyond `maxsize` keys.
+    """
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take a token; returns 0 when granted, else the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.maxsize:
+                self._buckets.popitem(last=False)
+            self._buckets[key] = [burst - 1, now]
+            return 0.0
+
+        self._buckets.move_to_end(key)
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+
+# KEYS[1] bucket; ARGV rate, burst. Uses the Redis clock so every process agrees.
+_TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or burst
+local at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - at) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by every API process through Redis, one script call per request."""
+
+    def __init__(self):
+        self._script = get_redis().register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return float(await self._script(keys=[f"ratelimit:{key}"], args=[rate, burst]))
+
+
+def create_buckets(backend: str = RATE_LIMIT_BACKEND):
+    if backend == "memory":
+        return MemoryBuckets()
+    if backend == "redis":
+        return RedisBuckets()
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def _subject(scope) -> str | None:
+    """User of a request with a valid access token."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                payload = decode_token(token)
+            except HTTPException:
+                return None
+            return payload.get("sub") if payload.get("type") == "access" else None
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After once a client exhausts its quota.
+
+    Authenticated requests are counted per user (the access token subject),
+    others per client IP (per /64 for IPv6), in one bucket per route group. Behind a proxy run
+    uvicorn with --proxy-headers so the client IP is the real one.
+    """
+
+    def __init__(self, app, limits: dict[str, str] | None = None, buckets=None):
+        self.app = app
+        limits = RATE_LIMITS if limits is None else limits
+        self.limits = {group: parsed for group, value in limits.items() if (parsed := parse_limit(value))}
+        self.buckets = buckets if buckets is not None else (create_buckets() if self.limits else None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limits:
+            await self.app(scope, receive, send)
+            return
+        group = route_group(scope["method"], scope["path"])
+        limit = self.limits.get(group)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        subject = _subject(scope) if group != "auth" else None
+        key = f"{group}:user:{subject}" if subject else f"{group}:ip:{client_key(scope['client'][0]) if scope.get('client') else ''}"
+        retry_after = await self.buckets.take(key, *limit)
+        if retry_after:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
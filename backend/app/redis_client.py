@@ -0,0 +1,19 @@
+import os
+
+# Shared backend of the rate limiter and the response cache (optional, needs
+# the redis package)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_client = None
+
+
+def get_redis():
+    """The process wide asyncio Redis client, created on first use."""
+    global _client
+    if _client is None:
+        try:
+            import redis.asyncio
+        except ImportError:
+            raise RuntimeError("The redis backends need the redis package: pip install redis")
+        _client = redis.asyncio.Redis.from_url(REDIS_URL)
+    return _client
@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache import TTLCache
+from app.db import async_session_maker, create_db_engine
+
+# Comma separated URLs of read replicas; empty sends every read to the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# How long a user's reads stay on the primary after they write; keep it above
+# the usual replication lag
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+REPLICA_PIN_CACHE_SIZE = int(os.getenv("REPLICA_PIN_CACHE_SIZE", "100000"))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "2"))
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of the users to pin again when the session commits
+_PIN_ON_COMMIT = "replica_pins"
+
+
+class ReplicaPool:
+    """Routes read-only sessions to healthy replicas in round robin.
+
+    A user's reads go to the primary for REPLICA_PIN_SECONDS after each of
+    their writes commits (app.crud.touch_contacts pins them), so they always
+    see their own changes. Replicas failing a health check get no reads until they pass
+    one again; with none healthy, reads fall back to the primary. Pins are kept
+    per process, like the other in-process caches.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.engines: list[AsyncEngine] = [create_db_engine(url) for url in urls]
+        self.healthy: list[AsyncEngine] = list(self.engines)
+        self.pins = TTLCache(maxsize=REPLICA_PIN_CACHE_SIZE, ttl=REPLICA_PIN_SECONDS)
+        self._counter = itertools.count()
+        self._session_maker = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+        self._task: asyncio.Task | None = None
+
+    def pin(self, user_id: uuid.UUID):
+        if self.engines:
+            self.pins.set(user_id, True)
+
+    def pin_on_commit(self, session: AsyncSession, user_id: uuid.UUID):
+        """Pin the user now and again when `session` commits, so a slow
+        transaction does not use up the pin before its changes are visible."""
+        if self.engines:
+            self.pin(user_id)
+            session.info.setdefault(_PIN_ON_COMMIT, set()).add(user_id)
+
+    def engine_for(self, user_id: uuid.UUID | None) -> AsyncEngine | None:
+        """The replica to read from, or None for the primary."""
+        healthy = self.healthy
+        if not healthy or (user_id is not None and self.pins.get(user_id)):
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        return session.bind in self.engines
+
+    @asynccontextmanager
+    async def session(self, user_id: uuid.UUID | None = None) -> AsyncIterator[AsyncSession]:
+        engine = self.engine_for(user_id)
+        session = async_session_maker() if engine is None else self._session_maker(bind=engine)
+        async with session:
+            yield session
+
+    async def check(self):
+        """Health check every replica with a short query."""
+        healthy = []
+        for engine in self.engines:
+            try:
+                # The timeout covers connecting too: an unreachable host must not stall the loop
+                await asyncio.wait_for(self._ping(engine), REPLICA_HEALTH_TIMEOUT)
+            except Exception as error:
+                logger.warning("Read replica %s failed its health check: %s", engine.url.render_as_string(), error)
+            else:
+                healthy.append(engine)
+        self.healthy = healthy
+
+    async def _ping(self, engine: AsyncEngine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def start(self):
+        if not self.engines:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Read replica health check failed")
+
+
+replica_pool = ReplicaPool(DATABASE_REPLICA_URLS)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_committed(session: Session):
+    for user_id in session.info.pop(_PIN_ON_COMMIT, ()):
+        replica_pool.pin(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_pins(session: Session, previous_transaction):
+    session.info.pop(_PIN_ON_COMMIT, None)
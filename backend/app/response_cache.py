@@ -0,0 +1,189 @@
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.metrics import CACHES
+from app.redis_client import get_redis
+from app.replicas import REPLICA_PIN_SECONDS, replica_pool
+
+# off, memory (one process) or redis (shared by several processes)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "off")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# Users whose generation the memory backend remembers (see MemoryResponseCache)
+RESPONSE_CACHE_MAX_USERS = int(os.getenv("RESPONSE_CACHE_MAX_USERS", "100000"))
+
+# Serialized responses of the contact reads, per user and per query.
+#
+# Every user has a generation number, bumped by invalidate() after each
+# committed write to their contacts or phones. Lookups read the generation
+# before the database, and an entry is stored under the generation read then
+# and only served while it is current. So a response built from data older
+# than a write can never be served after that write's invalidation, even when
+# the read raced with the write.
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: dict[str, str]
+
+
+class NullResponseCache:
+    """Used when the cache is off: never hits, stores nothing."""
+
+    enabled = False
+
+    async def get(self, user_id: uuid.UUID, key: str) -> tuple[CachedResponse | None, int]:
+        return None, 0
+
+    async def set(self, user_id: uuid.UUID, key: str, generation: int, response: CachedResponse, ttl: float | None = None):
+        pass
+
+    async def invalidate(self, user_id: uuid.UUID):
+        pass
+
+
+class MemoryResponseCache(NullResponseCache):
+    """In-process LRU of responses, evicted beyond `max_bytes` of bodies.
+
+    Generations come from one counter shared by all users, and only the
+    `max_users` most recently invalidated users keep their own. A forgotten
+    user falls back to the highest generation forgotten so far, which is never
+    lower than any generation they had, so their older reads still cannot be stored.
+    """
+
+    enabled = True
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl: float = RESPONSE_CACHE_TTL_SECONDS, max_users: int = RESPONSE_CACHE_MAX_USERS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_users = max_users
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = 0
+        self._floor = 0
+        self._generations: OrderedDict[uuid.UUID, int] = OrderedDict()
+        self._entries: OrderedDict[tuple[uuid.UUID, str], tuple[float, int, CachedResponse]] = OrderedDict()
+        self._keys: dict[uuid.UUID, set[str]] = {}
+
+    async def get(self, user_id: uuid.UUID, key: str) -> tuple[CachedResponse | None, int]:
+        generation = self._generations.get(user_id, self._floor)
+        entry = self._entries.get((user_id, key))
+        if entry is None or entry[1] != generation or entry[0] <= time.monotonic():
+            self.misses += 1
+            return None, generation
+        self._entries.move_to_end((user_id, key))
+        self.hits += 1
+        return entry[2], generation
+
+    async def set(self, user_id: uuid.UUID, key: str, generation: int, response: CachedResponse, ttl: float | None = None):
+        if generation != self._generations.get(user_id, self._floor) or len(response.body) > self.max_bytes:
+            return
+        self._remove(user_id, key)
+        self._entries[user_id, key] = (time.monotonic() + (self.ttl if ttl is None else ttl), generation, response)
+        self._keys.setdefault(user_id, set()).add(key)
+        self.size += len(response.body)
+        while self.size > self.max_bytes:
+            (old_user, old_key), _ = next(iter(self._entries.items()))
+            self._remove(old_user, old_key)
+
+    async def invalidate(self, user_id: uuid.UUID):
+        self._clock += 1
+        self._generations[user_id] = self._clock
+        self._generations.move_to_end(user_id)
+        self._drop_user(user_id)
+        while len(self._generations) > self.max_users:
+            old_user, generation = self._generations.popitem(last=False)
+            self._floor = max(self._floor, generation)
+            self._drop_user(old_user)
+
+    def _drop_user(self, user_id: uuid.UUID):
+        for key in list(self._keys.get(user_id, ())):
+            self._remove(user_id, key)
+
+    def _remove(self, user_id: uuid.UUID, key: str):
+        entry = self._entries.pop((user_id, key), None)
+        if entry is not None:
+            self.size -= len(entry[2].body)
+            keys = self._keys[user_id]
+            keys.discard(key)
+            if not keys:
+                del self._keys[user_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResponseCache(NullResponseCache):
+    """Responses shared by every API process through Redis.
+
+    An entry is stored as "<generation>\\n<headers JSON>\\n<body>", and a lookup
+    fetches it together with the user's generation in one MGET.
+    """
+
+    enabled = True
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._redis = get_redis()
+
+    async def get(self, user_id: uuid.UUID, key: str) -> tuple[CachedResponse | None, int]:
+        current, entry = await self._redis.mget(f"respcache:{user_id}:generation", f"respcache:{user_id}:{key}")
+        generation = int(current or 0)
+        if entry is not None:
+            stored, headers, body = entry.split(b"\n", 2)
+            if int(stored) == generation:
+                self.hits += 1
+                return CachedResponse(body, json.loads(headers)), generation
+        self.misses += 1
+        return None, generation
+
+    async def set(self, user_id: uuid.UUID, key: str, generation: int, response: CachedResponse, ttl: float | None = None):
+        value = f"{generation}\n{json.dumps(response.headers)}\n".encode() + response.body
+        await self._redis.set(f"respcache:{user_id}:{key}", value, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    async def invalidate(self, user_id: uuid.UUID):
+        await self._redis.incr(f"respcache:{user_id}:generation")
+
+    def __len__(self) -> int:
+        # Entries live in Redis; not counted here
+        return 0
+
+
+def create_response_cache(backend: str = RESPONSE_CACHE_BACKEND) -> NullResponseCache:
+    if backend == "off":
+        return NullResponseCache()
+    if backend == "memory":
+        return MemoryResponseCache()
+    if backend == "redis":
+        return RedisResponseCache()
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+cache = create_response_cache()
+if cache.enabled:
+    CACHES.register("response", cache)
+
+
+async def lookup(user_id: uuid.UUID, key: str) -> tuple[CachedResponse | None, int]:
+    """A cached response and the current generation, to pass to store() on a miss."""
+    return await cache.get(user_id, key)
+
+
+async def store(session, user_id: uuid.UUID, key: str, generation: int, body: bytes, headers: dict[str, str]):
+    # A replica may still miss the user's last write: keep its answers only
+    # as long as reads stay pinned to the primary after a write
+    ttl = REPLICA_PIN_SECONDS if replica_pool.is_replica(session) else None
+    await cache.set(user_id, key, generation, CachedResponse(body, headers), ttl)
+
+
+async def invalidate(user_id: uuid.UUID):
+    """Drop the user's cached responses; call after committing a change to their contacts or phones."""
+    await cache.invalidate(user_id)
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from app.db import async_session_maker
+from app.models import TokenBlacklist
+
+REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", "memory")
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+REVOCATION_PURGE_INTERVAL = float(os.getenv("REVOCATION_PURGE_INTERVAL", "3600"))
+# Overlap between syncs so rows committed late by other workers are not missed
+SYNC_OVERLAP = timedelta(seconds=30)
+
+logger = logging.getLogger(__name__)
+
+
+def token_key(token: str, payload: dict) -> str:
+    """The revocation key of a token: its jti, or a digest for tokens issued without one."""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationStore:
+    """Revoked refresh tokens, checked in memory and persisted in the tokenblacklist table.
+
+    Every unexpired revocation is kept in a dict keyed by jti, so a check is
+    one dict lookup. The table is read once at startup; this backend suits a
+    single API process.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self._synced_at: datetime | None = None
+        self._task: asyncio.Task | None = None
+
+    def is_revoked(self, jti: str) -> bool:
+        expires = self._revoked.get(jti)
+        if expires is None:
+            return False
+        if expires <= time.time():
+            # Expired tokens fail verification anyway
+            del self._revoked[jti]
+            return False
+        return True
+
+    async def revoke(self, jti: str, expires_at: datetime):
+        if self.is_revoked(jti):
+            return
+        self._revoked[jti] = expires_at.timestamp()
+        async with async_session_maker() as session:
+            session.add(TokenBlacklist(jti=jti, expires_at=expires_at))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Already revoked by another worker
+                await session.rollback()
+
+    async def sync(self):
+        """Load revocations recorded since the last sync."""
+        now = datetime.now(timezone.utc)
+        query = select(TokenBlacklist.jti, TokenBlacklist.expires_at).where(TokenBlacklist.expires_at > now)
+        if self._synced_at is not None:
+            query = query.where(TokenBlacklist.revoked_at > self._synced_at - SYNC_OVERLAP)
+
+        async with async_session_maker() as session:
+            result = await session.exec(query)
+            for jti, expires_at in result.all():
+                self._revoked[jti] = _aware(expires_at).timestamp()
+        self._synced_at = now
+
+    async def purge(self):
+        """Forget expired revocations, in memory and in the table."""
+        now = time.time()
+        self._revoked = {jti: expires for jti, expires in self._revoked.items() if expires > now}
+        async with async_session_maker() as session:
+            await session.exec(delete(TokenBlacklist).where(TokenBlacklist.expires_at <= datetime.now(timezone.utc)))
+            await session.commit()
+
+    async def start(self):
+        try:
+            await self.sync()
+        except Exception:
+            logger.exception("Could not load revoked tokens")
+        self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(REVOCATION_PURGE_INTERVAL)
+            await self._run(self.purge)
+
+    async def _run(self, step):
+        try:
+            await step()
+        except Exception:
+            logger.exception("Token revocation maintenance failed")
+
+
+class SharedRevocationStore(RevocationStore):
+    """Revocation store for several API processes sharing one database.
+
+    Each process also pulls the revocations made by the others every
+    REVOCATION_SYNC_INTERVAL seconds, which bounds how long a token revoked
+    elsewhere can still be used here.
+    """
+
+    async def _maintain(self):
+        last_purge = time.monotonic()
+        while True:
+            await asyncio.sleep(REVOCATION_SYNC_INTERVAL)
+            await self._run(self.sync)
+            if time.monotonic() - last_purge >= REVOCATION_PURGE_INTERVAL:
+                await self._run(self.purge)
+                last_purge = time.monotonic()
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite returns naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def create_revocation_store(backend: str = REVOCATION_BACKEND) -> RevocationStore:
+    if backend == "memory":
+        return RevocationStore()
+    if backend == "database":
+        return SharedRevocationStore()
+    raise ValueError(f"Unknown revocation backend: {backend}")
+
+
+revocation_store = create_revocation_store()
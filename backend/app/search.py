@@ -0,0 +1,118 @@
+import re
+import uuid
+
+from sqlalchemy import case, exists, func, literal_column, or_, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Contact, Phone
+from app.phone_numbers import query_digits
+
+# Full-text and trigram matching need PostgreSQL with pg_trgm; the indexes are
+# created by the contact_search migration. Other databases (SQLite in tests)
+# fall back to LIKE matching with a simple rank.
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix_tsquery(q: str) -> str | None:
+    """Turn free text into a prefix tsquery, e.g. "jon smi" -> "jon:* & smi:*"."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def _postgres_search(user_id: uuid.UUID, q: str):
+    """The user's matching contacts as an (id, phone_score) subquery, and their score.
+
+    Contacts and phones are matched in separate UNION branches: the contact
+    branch ORs predicates that each have a GIN index on contact, so it runs as
+    one BitmapOr, and the phone branch probes the number_digits trigram index
+    with the digits of `q`. A phone EXISTS in the same OR would make every
+    contact of the user a candidate instead.
+    """
+    prefix = _escape_like(q) + "%"
+    email = func.coalesce(Contact.email, "")
+    # Spelled with literals so it matches the ix_contact_search_tsv expression index
+    document = func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        Contact.name.concat(literal_column("' '")).concat(func.coalesce(Contact.email, literal_column("''"))),
+    )
+
+    conditions = [
+        Contact.name.ilike(prefix, escape="\\"),
+        Contact.email.ilike(prefix, escape="\\"),
+        Contact.name.op("%")(q),
+        Contact.email.op("%")(q),
+    ]
+    tsquery = _prefix_tsquery(q)
+    if tsquery:
+        query = func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+        conditions.append(document.op("@@")(query))
+
+    branches = (
+        select(Contact.id.label("id"), literal_column("0.0").label("phone_score"))
+        .where(Contact.user_id == user_id, or_(*conditions))
+    )
+    digits = query_digits(q)
+    if digits:
+        branches = union_all(
+            branches,
+            select(Phone.contact_id.label("id"), literal_column("0.5").label("phone_score"))
+            .join(Contact, Contact.id == Phone.contact_id)
+            .where(Contact.user_id == user_id, Phone.number_digits.like(f"%{digits}%")),
+        )
+    branches = branches.subquery()
+    matches = (
+        select(branches.c.id, func.max(branches.c.phone_score).label("phone_score"))
+        .group_by(branches.c.id)
+        .subquery("matches")
+    )
+
+    score = (
+        func.greatest(func.similarity(Contact.name, q), func.word_similarity(q, Contact.name), func.similarity(email, q))
+        + case((Contact.name.ilike(prefix, escape="\\"), 1.0), else_=0.0)
+        + matches.c.phone_score
+    )
+    if tsquery:
+        score = score + func.ts_rank(document, query)
+
+    return matches, score
+
+
+def _fallback_search(q: str):
+    prefix = _escape_like(q) + "%"
+    infix = "%" + _escape_like(q) + "%"
+    conditions = [
+        Contact.name.ilike(infix, escape="\\"),
+        Contact.email.ilike(infix, escape="\\"),
+    ]
+    if digits := query_digits(q):
+        conditions.append(exists().where(Phone.contact_id == Contact.id, Phone.number_digits.like(f"%{digits}%")))
+    score = case(
+        (Contact.name.ilike(prefix, escape="\\"), 2.0),
+        (Contact.name.ilike(infix, escape="\\"), 1.0),
+        else_=0.5,
+    )
+    return or_(*conditions), score
+
+
+async def search_contacts(session: AsyncSession, user_id: uuid.UUID, q: str, limit: int, offset: int = 0) -> list:
+    """Rank the user's contacts matching `q` by name, email or phone number."""
+    result = await session.exec(search_query(session.bind.dialect.name, user_id, q, limit, offset))
+    return result.all()
+
+
+def search_query(dialect: str, user_id: uuid.UUID, q: str, limit: int, offset: int = 0):
+    """The search statement for a database dialect, e.g. "postgresql"."""
+    columns = (Contact.id, Contact.name, Contact.email, Contact.user_id)
+    if dialect == "postgresql":
+        matches, score = _postgres_search(user_id, q)
+        query = select(*columns, score.label("score")).join(matches, matches.c.id == Contact.id)
+    else:
+        condition, score = _fallback_search(q)
+        query = select(*columns, score.label("score")).where(Contact.user_id == user_id, condition)
+    return query.order_by(score.desc(), Contact.name, Contact.id).limit(limit).offset(offset)
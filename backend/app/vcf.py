@@ -0,0 +1,280 @@
+import asyncio
+import codecs
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable
+
+import vobject
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import response_cache
+from app.crud import touch_contacts
+from app.models import Contact, ContactCreate, Phone, PhoneCreate
+from app.phone_numbers import number_digits
+
+VCF_IMPORT_BATCH_SIZE = int(os.getenv("VCF_IMPORT_BATCH_SIZE", "500"))
+VCF_READ_CHUNK_SIZE = int(os.getenv("VCF_READ_CHUNK_SIZE", str(64 * 1024)))
+MAX_REPORTED_WARNINGS = 10
+
+
+@dataclass
+class ImportReport:
+    """Running totals of a VCF import."""
+    parsed: int = 0
+    created: int = 0
+    skipped: int = 0
+    warnings: list[str] = field(default_factory=list)
+
+    def warn(self, message: str):
+        # Keep only the first few warnings to avoid a huge response
+        if len(self.warnings) < MAX_REPORTED_WARNINGS:
+            self.warnings.append(message)
+
+
+class _TextDecoder:
+    """Incrementally decode VCF bytes.
+
+    Files starting with a UTF-16 BOM are decoded as UTF-16. Anything else is
+    decoded a complete line at a time as UTF-8, falling back to latin-1 only
+    for the lines that are not valid UTF-8, so one stray byte does not garble
+    the rest of the file.
+    """
+
+    def __init__(self):
+        self._utf16 = None
+        self._started = False
+        self._pending = b""
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        if not self._started:
+            self._started = True
+            if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                self._utf16 = codecs.getincrementaldecoder("utf-16")()
+            else:
+                data = data.removeprefix(codecs.BOM_UTF8)
+        if self._utf16 is not None:
+            return self._utf16.decode(data, final)
+
+        data = self._pending + data
+        end = len(data) if final else data.rfind(b"\n") + 1
+        complete, self._pending = data[:end], data[end:]
+        try:
+            return complete.decode("utf-8")
+        except UnicodeDecodeError:
+            return "".join(_decode_line(line) for line in complete.splitlines(keepends=True))
+
+
+def _decode_line(line: bytes) -> str:
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        return line.decode("latin-1")
+
+
+async def read_chunks(file, chunk_size: int = VCF_READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an UploadFile (or any object with an async read) chunk by chunk."""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yield unfolded logical lines from a stream of VCF bytes."""
+    decoder = _TextDecoder()
+    pending = ""
+    logical = None
+
+    async def decoded():
+        async for chunk in chunks:
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True) + "\n"
+
+    async for text in decoded():
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line = line.rstrip("\r")
+            if line[:1] in (" ", "\t") and logical is not None:
+                # Folded line: continuation of the previous one
+                logical += line[1:]
+                continue
+            if logical is not None:
+                yield logical
+            logical = line
+
+    if logical is not None:
+        yield logical
+
+
+async def iter_vcards(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yield the text of each vCard in a VCF byte stream as soon as it is complete.
+
+    Only the current chunk and the card being assembled are held in memory,
+    so arbitrarily large exports are parsed with bounded memory.
+    """
+    current_block = None
+    async for line in _iter_lines(chunks):
+        marker = line.strip().upper()
+        if marker.startswith("BEGIN:VCARD"):
+            current_block = [line]
+        elif marker.startswith("END:VCARD"):
+            if current_block is not None:
+                current_block.append(line)
+                yield "\n".join(current_block)
+            current_block = None
+        elif current_block is not None:
+            current_block.append(line)
+
+
+def card_fields(vcard) -> tuple[str, str | None]:
+    """Extract the display name and email of a parsed vCard."""
+    name = ""
+    if hasattr(vcard, 'fn'):
+        name = vcard.fn.value
+    elif hasattr(vcard, 'n'):
+        name_parts = vcard.n.value
+        name = f"{name_parts.given} {name_parts.family}".strip()
+
+    email = None
+    if hasattr(vcard, 'email'):
+        email = vcard.email.value if hasattr(vcard.email, 'value') else str(vcard.email)
+
+    return name, email
+
+
+async def _existing_keys(session: AsyncSession, user_id: uuid.UUID) -> tuple[set[str], set[tuple[str, str]]]:
+    """Prefetch the names and (name, email) pairs the user already has."""
+    result = await session.exec(select(Contact.name, Contact.email).where(Contact.user_id == user_id))
+    names = set()
+    pairs = set()
+    for name, email in result.all():
+        names.add(name)
+        pairs.add((name, email))
+    return names, pairs
+
+
+async def _write_batch(session: AsyncSession, user_id: uuid.UUID, contacts: list[dict], phones: list[dict], batch_size: int):
+    """Write one chunk of contacts and phones with multi-row INSERTs and commit it."""
+    if contacts:
+        change_seq = await touch_contacts(session, user_id)
+        await session.exec(insert(Contact).values([{**contact, "change_seq": change_seq} for contact in contacts]))
+    for start in range(0, len(phones), batch_size):
+        await session.exec(insert(Phone).values(phones[start:start + batch_size]))
+    await session.commit()
+    await response_cache.invalidate(user_id)
+
+
+def _parse_card(vcard_text: str) -> tuple[str, str | None, list[PhoneCreate], list[str]]:
+    """Parse one vCard into its name, email, valid phones and warnings."""
+    vcard = vobject.readOne(vcard_text)
+    name, email = card_fields(vcard)
+    phones: list[PhoneCreate] = []
+    warnings: list[str] = []
+    if not name:
+        return name, email, phones, warnings
+
+    for tel in getattr(vcard, 'tel_list', []):
+        try:
+            phone_type = None
+            if hasattr(tel, 'type_param'):
+                phone_type = tel.type_param.lower() if tel.type_param else None
+
+            phones.append(PhoneCreate(number=tel.value, number_type=phone_type))
+        except Exception as phone_error:
+            # Skip invalid phone numbers but continue with the contact
+            warnings.append(f"Skipped invalid phone for {name}: {str(phone_error)}")
+    return name, email, phones, warnings
+
+
+def _parse_cards(vcard_texts: list[str]) -> list:
+    """Parse a batch of vCards; a card that cannot be parsed yields its exception."""
+    parsed = []
+    for vcard_text in vcard_texts:
+        try:
+            parsed.append(_parse_card(vcard_text))
+        except Exception as card_error:
+            parsed.append(card_error)
+    return parsed
+
+
+async def import_vcards(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    vcards: AsyncIterable[str],
+    batch_size: int = VCF_IMPORT_BATCH_SIZE,
+    report: ImportReport | None = None,
+    on_batch: Callable[[ImportReport], Awaitable[None]] | None = None,
+) -> ImportReport:
+    """Import vCard texts for a user in batches.
+
+    Cards are parsed `batch_size` at a time in a worker thread, since vobject
+    is pure Python and would otherwise hold up the event loop. Duplicates are
+    detected against one prefetched set of the user's contacts (same name, and
+    same email when the card has one), and new rows are written in chunks of
+    `batch_size` contacts, one transaction per chunk. `on_batch` is awaited
+    with the running report after each committed chunk.
+    """
+    report = report or ImportReport()
+    names, pairs = await _existing_keys(session, user_id)
+    contacts: list[dict] = []
+    phones: list[dict] = []
+
+    async def add(vcard_texts: list[str]):
+        nonlocal contacts, phones
+        for card in await asyncio.to_thread(_parse_cards, vcard_texts):
+            report.parsed += 1
+            try:
+                if isinstance(card, Exception):
+                    raise card
+                name, email, card_phones, warnings = card
+
+                if not name:
+                    report.skipped += 1
+                    continue  # Skip entries without a name
+
+                # Check if contact already exists (same name and email for this user)
+                duplicate = (name, email) in pairs if email else name in names
+                if duplicate:
+                    report.skipped += 1
+                    continue
+
+                contact_data = ContactCreate(name=name, email=email, user_id=user_id)
+                contact_id = uuid.uuid4()
+                contacts.append({"id": contact_id, **contact_data.model_dump()})
+                phones.extend(
+                    {"id": uuid.uuid4(), **phone.model_dump(), "contact_id": contact_id, "number_digits": number_digits(phone.number)}
+                    for phone in card_phones
+                )
+                for warning in warnings:
+                    report.warn(warning)
+                names.add(name)
+                pairs.add((name, email))
+                report.created += 1
+
+            except Exception as contact_error:
+                # Skip this contact but continue with others
+                report.skipped += 1
+                report.warn(f"Skipped contact: {str(contact_error)[:100]}")
+                continue
+
+            if len(contacts) >= batch_size:
+                await _write_batch(session, user_id, contacts, phones, batch_size)
+                contacts, phones = [], []
+                if on_batch:
+                    await on_batch(report)
+
+    vcard_texts: list[str] = []
+    async for vcard_text in vcards:
+        vcard_texts.append(vcard_text)
+        if len(vcard_texts) >= batch_size:
+            await add(vcard_texts)
+            vcard_texts = []
+    if vcard_texts:
+        await add(vcard_texts)
+
+    await _write_batch(session, user_id, contacts, phones, batch_size)
+    if on_batch:
+        await on_batch(report)
+    return report
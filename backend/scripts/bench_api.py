@@ -0,0 +1,272 @@
+"""Benchmark the API hot paths and store the results as JSON.
+
+Seeds USERS users with CONTACTS contacts of PHONES phones each, then drives
+each scenario with CONCURRENCY simultaneous clients against the app in
+process, and reports p50/p95/p99 latency, requests per second and SQL
+statements per request. An upload_vcf request lasts until its import job has
+finished, so it measures the whole import, not only the 202 answer. Runs against DATABASE_URL (a local Postgres with the
+migrations applied), or a SQLite file when it is not set.
+
+    python scripts/bench_api.py [--users 4] [--contacts 1000] [--phones 2]
+        [--concurrency 16] [--requests 500] [--scenarios login,read_contacts]
+        [--output bench-results/run.json] [--compare bench-results/base.json]
+
+Results go to bench-results/<timestamp>-<commit>.json by default; pass an
+earlier file with --compare to print the change against it.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join(tempfile.gettempdir(), "contact-bench.sqlite3"))
+os.environ.setdefault("SECRET_KEY", "bench-only-secret-key-not-for-production")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+from app.api.main import app  # noqa: E402
+from app.db import DATABASE_URL, async_session_maker, engine, init_db  # noqa: E402
+from app.models import Contact, Phone, User  # noqa: E402
+from app.passwords import hash_password  # noqa: E402
+from app.phone_numbers import number_digits  # noqa: E402
+
+PASSWORD = "bench-secret"
+SEED_BATCH_SIZE = 1000
+VCF_CARDS = 20
+IMPORT_POLL_SECONDS = 0.01
+SCENARIOS = ("login", "read_contacts", "read_phone", "create_contact", "update_contact", "create_phone", "delete_contact", "upload_vcf")
+
+
+class BenchUser:
+    def __init__(self, user_id: uuid.UUID, username: str):
+        self.id = user_id
+        self.username = username
+        self.headers: dict[str, str] = {}
+        self.contact_ids: list[uuid.UUID] = []
+        self.phone_ids: list[uuid.UUID] = []
+        # Contacts created by the benchmark, deleted by delete_contact
+        self.created: list[str] = []
+
+
+async def seed(users: int, contacts: int, phones: int) -> list[BenchUser]:
+    """Insert users, contacts and phones with multi-row INSERTs."""
+    run = uuid.uuid4().hex[:8]
+    hashed = await hash_password(PASSWORD)
+    seeded = []
+    async with async_session_maker() as session:
+        for index in range(users):
+            user = BenchUser(uuid.uuid4(), f"bench-{run}-{index}")
+            await session.exec(insert(User).values(id=user.id, username=user.username, email=f"{user.username}@example.com", hashed_password=hashed))
+
+            contact_rows, phone_rows = [], []
+            for number in range(contacts):
+                contact_id = uuid.uuid4()
+                contact_rows.append({"id": contact_id, "name": f"Contact {number:06}", "email": f"c{number}@example.com", "user_id": user.id})
+                for extra in range(phones):
+                    digits = f"1555{number:06}{extra}"
+                    phone_rows.append({"id": uuid.uuid4(), "number": digits, "number_digits": number_digits(digits), "number_type": "mobile", "contact_id": contact_id})
+            for start in range(0, len(contact_rows), SEED_BATCH_SIZE):
+                await session.exec(insert(Contact).values(contact_rows[start:start + SEED_BATCH_SIZE]))
+            for start in range(0, len(phone_rows), SEED_BATCH_SIZE):
+                await session.exec(insert(Phone).values(phone_rows[start:start + SEED_BATCH_SIZE]))
+            await session.commit()
+
+            user.contact_ids = [row["id"] for row in contact_rows]
+            user.phone_ids = [row["id"] for row in phone_rows]
+            seeded.append(user)
+    return seeded
+
+
+def _vcf(user: BenchUser, index: int) -> bytes:
+    cards = [
+        f"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Imported {index}-{card}\r\nTEL;TYPE=cell:+1556{index:05}{card:03}\r\nEND:VCARD\r\n"
+        for card in range(VCF_CARDS)
+    ]
+    return "".join(cards).encode()
+
+
+async def _request(client: httpx.AsyncClient, scenario: str, user: BenchUser, index: int) -> httpx.Response:
+    headers = user.headers
+    if scenario == "login":
+        return await client.post("/auth/login", json={"username": user.username, "password": PASSWORD})
+    if scenario == "read_contacts":
+        return await client.get("/contacts/", params={"limit": 50}, headers=headers)
+    if scenario == "read_phone":
+        return await client.get(f"/phones/{random.choice(user.phone_ids)}", headers=headers)
+    if scenario == "create_contact":
+        response = await client.post("/contacts/", json={"name": f"Bench {index:06}", "user_id": str(user.id)}, headers=headers)
+        if response.status_code == 200:
+            user.created.append(response.json()["id"])
+        return response
+    if scenario == "update_contact":
+        contact_id = random.choice(user.contact_ids)
+        return await client.put(f"/contacts/{contact_id}", json={"name": f"Renamed {index:06}", "user_id": str(user.id)}, headers=headers)
+    if scenario == "create_phone":
+        return await client.post("/phones/", json={"number": f"+1557{index:07}", "contact_id": str(random.choice(user.contact_ids))}, headers=headers)
+    if scenario == "delete_contact":
+        return await client.delete(f"/contacts/{user.created.pop()}", headers=headers)
+    if scenario == "upload_vcf":
+        return await _upload_vcf(client, user, index)
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def _upload_vcf(client: httpx.AsyncClient, user: BenchUser, index: int) -> httpx.Response:
+    """Upload a file and poll its import job; returns the job once it has finished."""
+    response = await client.post(
+        "/contacts/upload-vcf",
+        files={"file": ("bench.vcf", _vcf(user, index), "text/vcard")},
+        data={"user_id": str(user.id)},
+        headers=user.headers,
+    )
+    while response.status_code < 400 and response.json()["status"] in ("queued", "running"):
+        await asyncio.sleep(IMPORT_POLL_SECONDS)
+        response = await client.get(f"/contacts/imports/{response.json()['id']}", headers=user.headers)
+    return response
+
+
+def _failed(scenario: str, response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    return scenario == "upload_vcf" and response.json()["status"] != "done"
+
+
+def _percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, users: list[BenchUser], concurrency: int, requests: int) -> dict:
+    """Send `requests` requests of one scenario from `concurrency` workers."""
+    if scenario == "delete_contact":
+        requests = min(requests, sum(len(user.created) for user in users))
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    async def worker(user: BenchUser):
+        nonlocal errors
+        while (index := next(counter)) < requests:
+            if scenario == "delete_contact" and not user.created:
+                break
+            start = time.perf_counter()
+            response = await _request(client, scenario, user, index)
+            latencies.append(time.perf_counter() - start)
+            if _failed(scenario, response):
+                errors += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(users[number % len(users)]) for number in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - start
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    sent = len(latencies_ms)
+    return {
+        "requests": sent,
+        "errors": errors,
+        "rps": round(sent / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies_ms, 50), 2),
+        "p95_ms": round(_percentile(latencies_ms, 95), 2),
+        "p99_ms": round(_percentile(latencies_ms, 99), 2),
+        "queries_per_request": round(statements / sent, 2) if sent else 0.0,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, base: dict):
+    """Print the change of each scenario against an earlier result file."""
+    print(f"\ncompared with {base.get('commit')} ({base.get('timestamp')})")
+    for scenario, current in results["scenarios"].items():
+        before = base.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        changes = []
+        for metric in ("rps", "p95_ms", "queries_per_request"):
+            if before[metric]:
+                changes.append(f"{metric} {(current[metric] - before[metric]) / before[metric] * 100:+6.1f}%")
+        print(f"{scenario:>16}: " + ", ".join(changes))
+
+
+async def main(args: argparse.Namespace) -> dict:
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if DATABASE_URL.startswith("sqlite"):
+        await init_db()
+    users = await seed(args.users, args.contacts, args.phones)
+
+    results = {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": engine.url.get_backend_name(),
+        "config": {key: getattr(args, key) for key in ("users", "contacts", "phones", "concurrency", "requests")},
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for user in users:
+            response = await client.post("/auth/login", json={"username": user.username, "password": PASSWORD})
+            user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        print(f"{results['database']} users={args.users} contacts={args.contacts} phones={args.phones} concurrency={args.concurrency}")
+        for scenario in scenarios:
+            result = await run_scenario(client, scenario, users, args.concurrency, args.requests)
+            results["scenarios"][scenario] = result
+            print(
+                f"{scenario:>16}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms"
+                f"  p99 {result['p99_ms']:7.2f} ms  {result['queries_per_request']:5.2f} queries/req  {result['errors']} errors"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--contacts", type=int, default=1000, help="contacts per user")
+    parser.add_argument("--phones", type=int, default=2, help="phones per contact")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    output = args.output or Path("bench-results") / f"{results['timestamp'].replace(':', '')}-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"results written to {output}")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
@@ -0,0 +1,54 @@
+"""Measure login password checks under concurrency.
+
+Runs CONCURRENCY simultaneous verifications, first on the password worker
+pool and then inline on the event loop, and reports throughput together
+with the worst event-loop stall seen by a 10 ms ticker.
+
+    python scripts/bench_passwords.py [concurrency] [rounds]
+"""
+import asyncio
+import sys
+import time
+
+from app.passwords import PASSWORD_HASH_WORKERS, _verify_and_update, hash_password, verify_password
+
+TICK = 0.01
+
+
+async def _ticker(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+    return worst
+
+
+async def _measure(label: str, check, hashed: str, concurrency: int, rounds: int):
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(check("secret", hashed) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await ticker
+
+    total = concurrency * rounds
+    print(f"{label:>8}: {total / elapsed:7.1f} logins/s, {elapsed / rounds * 1000:7.1f} ms per round, worst loop stall {stall * 1000:6.1f} ms")
+
+
+async def _inline(password: str, hashed: str):
+    return _verify_and_update(password, hashed)
+
+
+async def main(concurrency: int, rounds: int):
+    hashed = await hash_password("secret")
+    print(f"concurrency={concurrency} rounds={rounds} workers={PASSWORD_HASH_WORKERS}")
+    await _measure("pool", verify_password, hashed, concurrency, rounds)
+    await _measure("inline", _inline, hashed, concurrency, rounds)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args + [16, 5][len(args):])))
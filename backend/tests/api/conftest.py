@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def register():
+    """Register a new user: register(client) returns the username; the password is "secret"."""
+
+    def register(client: TestClient) -> str:
+        username = f"user-{uuid.uuid4().hex[:8]}"
+        client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+        return username
+
+    return register
+
+
+@pytest.fixture
+def login(register):
+    """Register and log in a new user: login(client) returns (auth headers, user id)."""
+
+    def login(client: TestClient) -> tuple[dict, str]:
+        username = register(client)
+        token = client.post("/auth/login", json={"username": username, "password": "secret"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        return headers, client.get("/auth/users/me", headers=headers).json()["id"]
+
+    return login
@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_batch_applies_all_operations(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        keep = client.post("/contacts/", json={"name": "Keep", "user_id": user_id}, headers=headers).json()["id"]
+        drop = client.post("/contacts/", json={"name": "Drop", "user_id": user_id}, headers=headers).json()["id"]
+        phone = client.post("/phones/", json={"number": "5550100", "contact_id": keep}, headers=headers).json()["id"]
+        since = client.get("/contacts/changes", headers=headers).json()["cursor"]
+
+        response = client.post("/contacts/batch", json={"operations": [
+            {"action": "create", "name": "New", "phones": [{"number": "5550101", "number_type": "mobile"}]},
+            {"action": "update", "id": keep, "name": "Kept", "email": "kept@example.com"},
+            {"action": "delete", "id": drop},
+            {"action": "update", "kind": "phone", "id": phone, "number": "5550102"},
+            {"action": "create", "kind": "phone", "contact_id": keep, "number": "5550103"},
+        ]}, headers=headers)
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["applied"]
+        assert [result["status"] for result in body["results"]] == [201, 200, 204, 200, 201]
+        created = body["results"][0]
+        assert len(created["phone_ids"]) == 1
+
+        new = client.get(f"/contacts/{created['id']}", headers=headers).json()
+        assert [p["number_type"] for p in new["phones"]] == ["mobile"]
+        kept = client.get(f"/contacts/{keep}", headers=headers).json()
+        assert kept["name"] == "Kept"
+        assert len(kept["phones"]) == 2
+        assert client.get(f"/contacts/{drop}", headers=headers).status_code == 404
+
+        delta = client.get("/contacts/changes", params={"since": since}, headers=headers).json()
+        assert sorted(contact["name"] for contact in delta["contacts"]) == ["Kept", "New"]
+        assert delta["deleted_contacts"] == [drop]
+
+
+def test_batch_is_all_or_nothing(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        other_headers, other_id = login(client)
+        contact = client.post("/contacts/", json={"name": "Mine", "user_id": user_id}, headers=headers).json()["id"]
+        foreign = client.post("/contacts/", json={"name": "Theirs", "user_id": other_id}, headers=other_headers).json()["id"]
+
+        response = client.post("/contacts/batch", json={"operations": [
+            {"action": "create", "name": "New"},
+            {"action": "update", "id": foreign, "name": "Stolen"},
+            {"action": "delete", "id": contact},
+            {"action": "update", "id": contact, "name": "Again"},
+            {"action": "update", "kind": "phone", "number": "5550100"},
+        ]}, headers=headers)
+
+        assert response.status_code == 400
+        assert [result["status"] for result in response.json()["results"]] == [424, 404, 424, 409, 422]
+        assert [c["name"] for c in client.get("/contacts/", headers=headers).json()] == ["Mine"]
+        assert client.get(f"/contacts/{foreign}", headers=other_headers).json()["name"] == "Theirs"
@@ -0,0 +1,64 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.api.pagination import encode_cursor
+from app.db import init_db
+
+
+def _sync(client: TestClient, headers: dict, since: str | None = None, limit: int = 100) -> dict:
+    params = {"limit": limit} | ({"since": since} if since else {})
+    response = client.get("/contacts/changes", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_since_cursor(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+
+        ids = {name: client.post("/contacts/", json={"name": name, "user_id": user_id}, headers=headers).json()["id"] for name in "ABC"}
+        phone_id = client.post("/phones/", json={"number": "5550100", "contact_id": ids["A"]}, headers=headers).json()["id"]
+
+        full = _sync(client, headers)
+        assert sorted(contact["name"] for contact in full["contacts"]) == ["A", "B", "C"]
+        assert _sync(client, headers, full["cursor"])["contacts"] == []
+
+        client.put(f"/contacts/{ids['B']}", json={"name": "B2", "user_id": user_id}, headers=headers)
+        client.delete(f"/phones/{phone_id}", headers=headers)
+        client.delete(f"/contacts/{ids['C']}", headers=headers)
+
+        delta = _sync(client, headers, full["cursor"])
+        assert {contact["name"]: contact["phones"] for contact in delta["contacts"]} == {"B2": [], "A": []}
+        assert delta["deleted_contacts"] == [ids["C"]]
+        assert delta["deleted_phones"] == [phone_id]
+        assert not delta["has_more"]
+
+
+def test_changes_are_paginated(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        for name in "ABCDE":
+            client.post("/contacts/", json={"name": name, "user_id": user_id}, headers=headers)
+
+        names, cursor, pages = [], None, 0
+        while True:
+            page = _sync(client, headers, cursor, limit=2)
+            names += [contact["name"] for contact in page["contacts"]]
+            cursor, pages = page["cursor"], pages + 1
+            if not page["has_more"]:
+                break
+        assert (names, pages) == (list("ABCDE"), 3)
+
+
+def test_expired_cursor_is_gone(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, _ = login(client)
+
+        stale = encode_cursor(0, None, time.time() - 365 * 86400)
+        assert client.get("/contacts/changes", params={"since": stale}, headers=headers).status_code == 410
+        assert client.get("/contacts/changes", params={"since": "junk"}, headers=headers).status_code == 400
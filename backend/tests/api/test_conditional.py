@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_collection_etag_changes_on_writes(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+
+        first = client.get("/contacts/", headers=headers)
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert client.get("/contacts/?limit=1", headers=headers).headers["etag"] != first.headers["etag"]
+
+        contact = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()
+        second = client.get("/contacts/", headers={**headers, "If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert [row["name"] for row in second.json()] == ["Ada"]
+
+        client.post("/phones/", json={"number": "5550100", "contact_id": contact["id"]}, headers=headers)
+        assert client.get("/contacts/", headers={**headers, "If-None-Match": second.headers["etag"]}).status_code == 200
+
+
+def test_if_match_guards_contact_writes(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        contact_id = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+        etag = client.get(f"/contacts/{contact_id}", headers=headers).headers["etag"]
+
+        body = {"name": "Ada L", "user_id": user_id}
+        response = client.put(f"/contacts/{contact_id}", json=body, headers={**headers, "If-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] == client.get(f"/contacts/{contact_id}", headers=headers).headers["etag"]
+        assert set(response.json()) == {"id", "name", "email", "user_id", "phones"}
+
+        response = client.put(f"/contacts/{contact_id}", json=body, headers={**headers, "If-Match": etag})
+        assert response.status_code == 412
+        assert client.delete(f"/contacts/{contact_id}", headers={**headers, "If-Match": etag}).status_code == 412
+        assert client.put(f"/contacts/{contact_id}", json=body, headers={**headers, "If-Match": "garbage"}).status_code == 412
+
+        fresh = client.get(f"/contacts/{contact_id}", headers=headers).headers["etag"]
+        assert client.delete(f"/contacts/{contact_id}", headers={**headers, "If-Match": fresh}).status_code == 200
+        assert client.delete(f"/contacts/{contact_id}", headers={**headers, "If-Match": fresh}).status_code == 404
+
+
+def test_phone_etag_follows_its_contact(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        contact_id = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+        phone_id = client.post("/phones/", json={"number": "5550100", "contact_id": contact_id}, headers=headers).json()["id"]
+
+        etag = client.get(f"/phones/{phone_id}", headers=headers).headers["etag"]
+        assert client.get(f"/phones/{phone_id}", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+        client.put(f"/contacts/{contact_id}", json={"name": "Ada L", "user_id": user_id}, headers=headers)
+        response = client.get(f"/phones/{phone_id}", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["contact"]["name"] == "Ada L"
+
+        body = {"number": "5550101", "contact_id": contact_id}
+        assert client.put(f"/phones/{phone_id}", json=body, headers={**headers, "If-Match": etag}).status_code == 412
+        assert client.put(f"/phones/{phone_id}", json=body, headers={**headers, "If-Match": response.headers["etag"]}).status_code == 200
@@ -0,0 +1,75 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.api.main import app
+from app.db import async_session_maker, init_db
+from app.models import Contact
+
+
+def test_find_and_merge_duplicates(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+
+        def contact(name: str, email: str | None = None, numbers: tuple = ()) -> str:
+            contact_id = client.post("/contacts/", json={"name": name, "email": email, "user_id": user_id}, headers=headers).json()["id"]
+            for number in numbers:
+                client.post("/phones/", json={"number": number, "contact_id": contact_id}, headers=headers)
+            return contact_id
+
+        john = contact("John Smith", numbers=("5550100",))
+        jon = contact("Jon Smyth", "jon@example.com", numbers=("555 0100", "5550199"))
+        contact("Alice Walker", "alice@example.com")
+        contact("Bob", "alice@example.org")
+        contact("Carol")
+
+        clusters = client.get("/contacts/duplicates", headers=headers).json()
+        assert [sorted(c["name"] for c in cluster["contacts"]) for cluster in clusters] == [
+            ["Alice Walker", "Bob"], ["John Smith", "Jon Smyth"],
+        ]
+        assert clusters[1]["matched_on"] == ["name", "phone"]
+
+        response = client.post(f"/contacts/{john}/merge", json={"contact_ids": [jon]}, headers=headers)
+        assert response.status_code == 200, response.text
+        merged = response.json()
+        assert merged["email"] == "jon@example.com"
+        assert sorted(phone["number"] for phone in merged["phones"]) == ["5550100", "5550199"]
+        assert client.get(f"/contacts/{jon}", headers=headers).status_code == 404
+
+        # Keys follow the merge
+        clusters = client.get("/contacts/duplicates", headers=headers).json()
+        assert [sorted(c["name"] for c in cluster["contacts"]) for cluster in clusters] == [["Alice Walker", "Bob"]]
+
+
+def test_merge_requires_owned_contacts(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        other_headers, other_id = login(client)
+        mine = client.post("/contacts/", json={"name": "Mine", "user_id": user_id}, headers=headers).json()["id"]
+        theirs = client.post("/contacts/", json={"name": "Theirs", "user_id": other_id}, headers=other_headers).json()["id"]
+
+        assert client.post(f"/contacts/{mine}/merge", json={"contact_ids": [theirs]}, headers=headers).status_code == 404
+        assert client.post(f"/contacts/{mine}/merge", json={"contact_ids": [mine]}, headers=headers).status_code == 400
+        assert client.get(f"/contacts/{theirs}", headers=other_headers).status_code == 200
+
+
+def test_contacts_from_before_dedup_keys_are_clustered(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+
+        async def seed():
+            # Rows as the migrations left them: change_seq 0, no keys
+            async with async_session_maker() as session:
+                await session.exec(insert(Contact).values([
+                    {"id": uuid.uuid4(), "name": name, "user_id": uuid.UUID(user_id), "change_seq": 0}
+                    for name in ("John Smith", "Jon Smyth", "Bob")
+                ]))
+                await session.commit()
+
+        client.portal.call(seed)
+        clusters = client.get("/contacts/duplicates", headers=headers).json()
+        assert [sorted(c["name"] for c in cluster["contacts"]) for cluster in clusters] == [["John Smith", "Jon Smyth"]]
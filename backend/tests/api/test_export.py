@@ -0,0 +1,48 @@
+import csv
+import gzip
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_export_formats(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        ada = client.post("/contacts/", json={"name": "Ada", "email": "ada@example.com", "user_id": user_id}, headers=headers).json()["id"]
+        client.post("/contacts/", json={"name": "Bob", "user_id": user_id}, headers=headers)
+        for number in ("5550100", "5550101"):
+            client.post("/phones/", json={"number": number, "number_type": "home", "contact_id": ada}, headers=headers)
+
+        response = client.get("/contacts/export", params={"format": "jsonl"}, headers={**headers, "Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [(row["name"], len(row["phones"])) for row in rows] == [("Ada", 2), ("Bob", 0)]
+
+        response = client.get("/contacts/export", params={"format": "csv"}, headers=headers)
+        assert response.headers["content-disposition"] == 'attachment; filename="contacts.csv"'
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["name"] for row in rows] == ["Ada", "Bob"]
+        assert rows[0]["email"] == "ada@example.com"
+
+        response = client.get("/contacts/export", headers=headers)
+        assert response.headers["content-type"].startswith("text/vcard")
+        assert response.text.count("BEGIN:VCARD") == 2
+
+
+def test_export_is_gzipped_when_accepted(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers)
+
+        with client.stream("GET", "/contacts/export", params={"format": "jsonl"}, headers={**headers, "Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            body = b"".join(response.iter_raw())
+
+        assert json.loads(gzip.decompress(body))["name"] == "Ada"
@@ -0,0 +1,51 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+VCF = (
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Ada Lovelace\r\nEMAIL:ada@example.com\r\nTEL;TYPE=CELL:+1 555 010 2000\r\nEND:VCARD\r\n"
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Alan Turing\r\nTEL:not a number\r\nEND:VCARD\r\n"
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Ada Lovelace\r\nEMAIL:ada@example.com\r\nEND:VCARD\r\n"
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nEMAIL:nobody@example.com\r\nEND:VCARD\r\n"
+)
+
+
+def _wait_for(client, job_id: str, headers: dict) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(f"/contacts/imports/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Import job {job_id} did not finish")
+
+
+def test_upload_runs_an_import_job(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        other_headers, _ = login(client)
+
+        response = client.post(
+            "/contacts/upload-vcf",
+            files={"file": ("contacts.vcf", VCF.encode(), "text/vcard")},
+            data={"user_id": user_id},
+            headers=headers,
+        )
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        job = _wait_for(client, job_id, headers)
+        assert job["status"] == "done", job
+        assert (job["cards_parsed"], job["contacts_created"], job["contacts_skipped"]) == (4, 2, 2)
+        assert any("Alan Turing" in warning for warning in job["warnings"])
+
+        contacts = client.get("/contacts/", headers=headers).json()
+        assert [(contact["name"], [phone["number"] for phone in contact["phones"]]) for contact in contacts] == [
+            ("Ada Lovelace", ["15550102000"]), ("Alan Turing", []),
+        ]
+
+        assert client.get(f"/contacts/imports/{job_id}", headers=other_headers).status_code == 404
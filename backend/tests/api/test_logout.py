@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_refresh_token_is_rejected_after_logout(register):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+
+        username = register(client)
+        refresh_token = client.post("/auth/login", json={"username": username, "password": "secret"}).json()["refresh_token"]
+
+        assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+        assert client.post("/auth/logout", json={"refresh_token": refresh_token}).status_code == 200
+        assert client.post("/auth/logout", json={"refresh_token": refresh_token}).status_code == 200
+
+        response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token has been revoked"
@@ -0,0 +1,93 @@
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.api.pagination import decode_cursor, decode_keyset, encode_cursor, parse_fields
+from app.db import init_db
+
+
+def test_cursor_round_trip():
+    contact_id = uuid.uuid4()
+    cursor = encode_cursor("Ada Lovelace", contact_id)
+
+    assert decode_cursor(cursor, 2) == ["Ada Lovelace", str(contact_id)]
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", 2)
+
+    assert exc.value.status_code == 400
+
+    # Well-formed JSON, but not a (name, id) pair
+    for values in ((1, uuid.uuid4()), (None, uuid.uuid4()), ("Ada", 1)):
+        with pytest.raises(HTTPException) as exc:
+            decode_keyset(encode_cursor(*values))
+        assert exc.value.status_code == 400
+
+
+def test_parse_fields_keeps_declared_order():
+    assert parse_fields("phones, name", ("id", "name", "phones")) == ["name", "phones"]
+    assert parse_fields(None, ("id", "name")) == ["id", "name"]
+
+    with pytest.raises(HTTPException):
+        parse_fields("password", ("id", "name"))
+
+
+def test_contacts_follow_the_cursor(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        for name in ("Eve", "Bob", "Dan", "Ada", "Cy"):
+            client.post("/contacts/", json={"name": name, "user_id": user_id}, headers=headers)
+
+        names, cursor = [], None
+        while True:
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            response = client.get("/contacts/", params=params, headers=headers)
+            assert len(response.json()) <= 2
+            names += [contact["name"] for contact in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert names == ["Ada", "Bob", "Cy", "Dan", "Eve"]
+        assert client.get("/contacts/", params={"cursor": "bogus"}, headers=headers).status_code == 400
+
+
+def test_contacts_fields_projection(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        contact_id = client.post("/contacts/", json={"name": "Ada", "email": "ada@example.com", "user_id": user_id}, headers=headers).json()["id"]
+        client.post("/phones/", json={"number": "5550100", "contact_id": contact_id}, headers=headers)
+
+        assert client.get("/contacts/", params={"fields": "name,email"}, headers=headers).json() == [{"name": "Ada", "email": "ada@example.com"}]
+        [row] = client.get("/contacts/", params={"fields": "id,phones"}, headers=headers).json()
+        assert (row["id"], [phone["number"] for phone in row["phones"]]) == (contact_id, ["5550100"])
+        assert client.get("/contacts/", params={"fields": "password"}, headers=headers).status_code == 400
+
+
+def test_contacts_stream_as_ndjson(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        for name in ("Bob", "Ada", "Cy"):
+            contact_id = client.post("/contacts/", json={"name": name, "user_id": user_id}, headers=headers).json()["id"]
+            for number in ("5550100", "5550101"):
+                client.post("/phones/", json={"number": number, "contact_id": contact_id}, headers=headers)
+
+        response = client.get("/contacts/", params={"stream": "true"}, headers=headers)
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["name"] for row in rows] == ["Ada", "Bob", "Cy"]
+        assert all(len(row["phones"]) == 2 for row in rows)
+
+        cursor = client.get("/contacts/", params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+        rest = client.get("/contacts/", params={"stream": "true", "cursor": cursor, "fields": "name"}, headers=headers)
+        assert [json.loads(line) for line in rest.text.splitlines()] == [{"name": "Bob"}, {"name": "Cy"}]
+        assert client.get("/contacts/", params={"stream": "true", "limit": 2}, headers=headers).status_code == 400
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_lookup_matches_any_format_of_the_users_numbers(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        other_headers, other_id = login(client)
+        ada = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+        theirs = client.post("/contacts/", json={"name": "Theirs", "user_id": other_id}, headers=other_headers).json()["id"]
+        response = client.post("/phones/", json={"number": "+1 (555) 010-2000 ext. 12", "contact_id": ada}, headers=headers)
+        assert response.json()["number"] == "15550102000;ext=12"
+        client.post("/phones/", json={"number": "15550102000", "contact_id": theirs}, headers=other_headers)
+
+        for number in ("15550102000", "+1 555 010 2000", "001-555-010-2000"):
+            response = client.get("/phones/lookup", params={"number": number}, headers=headers)
+            assert [phone["contact"]["name"] for phone in response.json()] == ["Ada"]
+
+        assert client.get("/phones/lookup", params={"number": "5550199"}, headers=headers).json() == []
+        assert client.get("/phones/lookup", params={"number": "call me"}, headers=headers).status_code == 422
+
+
+def test_number_filter_matches_digits(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        contact_id = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+        for number in ("+1 555 010 2000", "+44 20 7946 0958"):
+            client.post("/phones/", json={"number": number, "contact_id": contact_id}, headers=headers)
+
+        response = client.get("/phones/", params={"number": "+1 (555)"}, headers=headers)
+        assert [phone["number"] for phone in response.json()] == ["15550102000"]
+        assert client.get("/phones/", params={"number": "+"}, headers=headers).status_code == 422
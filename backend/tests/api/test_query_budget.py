@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.deps import principal_cache
+from app.api.main import app
+from app.db import engine, init_db
+
+# Maximum number of SQL statements each endpoint may issue, including the
+# principal lookup on a cold authentication cache. List reads also fetch the
+# user's contacts version for the ETag; writes bump the row, contact and user
+# versions behind the ETags, and deletes also record a tombstone. A batch
+# issues one statement per kind of write, whatever its size.
+QUERY_BUDGETS = {
+    "read_contacts": 4,
+    "read_contacts_not_modified": 2,
+    "read_phones": 3,
+    "lookup_phone": 2,
+    "read_contact": 3,
+    "read_contact_not_modified": 2,
+    "search_contacts": 2,
+    "read_contact_changes": 4,
+    "create_phone": 4,
+    "read_phone": 2,
+    "update_phone": 4,
+    "delete_phone": 5,
+    "delete_contact": 4,
+    "batch_contacts": 11,
+}
+
+
+@contextmanager
+def count_queries():
+    principal_cache.clear()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _within_budget(name: str, statements: list[str]):
+    assert len(statements) <= QUERY_BUDGETS[name], f"{name} issued {len(statements)} queries:\n" + "\n".join(statements)
+
+
+def test_endpoints_stay_within_query_budget(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+
+        contact_id = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+        for number in ("100", "200", "300"):
+            client.post("/phones/", json={"number": number, "contact_id": contact_id}, headers=headers)
+
+        with count_queries() as statements:
+            response = client.get("/contacts/", headers=headers)
+        assert response.status_code == 200
+        _within_budget("read_contacts", statements)
+
+        with count_queries() as statements:
+            response = client.get("/contacts/", headers={**headers, "If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+        _within_budget("read_contacts_not_modified", statements)
+
+        with count_queries() as statements:
+            response = client.get("/phones/?limit=2", headers=headers)
+        assert len(response.json()) == 2
+        assert "x-next-cursor" in response.headers
+        _within_budget("read_phones", statements)
+
+        with count_queries() as statements:
+            response = client.get("/phones/lookup", params={"number": "(2) 0-0"}, headers=headers)
+        assert [(match["number"], match["contact"]["name"]) for match in response.json()] == [("200", "Ada")]
+        _within_budget("lookup_phone", statements)
+
+        with count_queries() as statements:
+            response = client.get("/contacts/search?q=20", headers=headers)
+        assert [match["name"] for match in response.json()] == ["Ada"]
+        _within_budget("search_contacts", statements)
+
+        with count_queries() as statements:
+            response = client.get("/contacts/changes", headers=headers)
+        assert len(response.json()["contacts"][0]["phones"]) == 3
+        _within_budget("read_contact_changes", statements)
+
+        with count_queries() as statements:
+            response = client.get(f"/contacts/{contact_id}", headers=headers)
+        assert len(response.json()["phones"]) == 3
+        _within_budget("read_contact", statements)
+
+        with count_queries() as statements:
+            response = client.get(f"/contacts/{contact_id}", headers={**headers, "If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+        _within_budget("read_contact_not_modified", statements)
+
+        with count_queries() as statements:
+            phone = client.post("/phones/", json={"number": "400", "contact_id": contact_id}, headers=headers).json()
+        _within_budget("create_phone", statements)
+
+        with count_queries() as statements:
+            response = client.get(f"/phones/{phone['id']}", headers=headers)
+        assert response.json()["contact"]["name"] == "Ada"
+        _within_budget("read_phone", statements)
+
+        with count_queries() as statements:
+            client.put(f"/phones/{phone['id']}", json={"number": "401", "contact_id": contact_id}, headers=headers)
+        _within_budget("update_phone", statements)
+
+        with count_queries() as statements:
+            client.delete(f"/phones/{phone['id']}", headers=headers)
+        _within_budget("delete_phone", statements)
+
+        phone_ids = [phone["id"] for phone in client.get(f"/contacts/{contact_id}", headers=headers).json()["phones"]]
+        operations = [{"action": "create", "name": f"New {i}", "phones": [{"number": f"555{i:04}"}]} for i in range(20)]
+        operations += [{"action": "update", "kind": "phone", "id": phone_ids[0], "number": "101"}]
+        operations += [{"action": "delete", "kind": "phone", "id": phone_ids[1]}]
+        operations += [{"action": "create", "kind": "phone", "contact_id": contact_id, "number": "500"}]
+        other_ids = [client.post("/contacts/", json={"name": f"Old {i}", "user_id": user_id}, headers=headers).json()["id"] for i in range(4)]
+        operations += [{"action": "update", "id": other_ids[0], "name": "Renamed"}, {"action": "update", "id": other_ids[1], "name": "Renamed"}]
+        operations += [{"action": "delete", "id": other_ids[2]}, {"action": "delete", "id": other_ids[3]}]
+        with count_queries() as statements:
+            response = client.post("/contacts/batch", json={"operations": operations}, headers=headers)
+        assert response.status_code == 200, response.text
+        _within_budget("batch_contacts", statements)
+
+        with count_queries() as statements:
+            response = client.delete(f"/contacts/{contact_id}", headers=headers)
+        assert response.status_code == 200
+        _within_budget("delete_contact", statements)
@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import response_cache
+from app.api.main import app
+from app.db import engine, init_db
+from app.response_cache import MemoryResponseCache
+
+
+def test_cached_reads_skip_the_database_until_a_write(monkeypatch, login):
+    monkeypatch.setattr(response_cache, "cache", MemoryResponseCache())
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        contact_id = client.post("/contacts/", json={"name": "Ada", "user_id": user_id}, headers=headers).json()["id"]
+
+        first = client.get("/contacts/?fields=id,name", headers=headers)
+        one = client.get(f"/contacts/{contact_id}", headers=headers)
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            second = client.get("/contacts/?fields=id,name", headers=headers)
+            again = client.get(f"/contacts/{contact_id}", headers=headers)
+            revalidated = client.get(f"/contacts/{contact_id}", headers={**headers, "If-None-Match": one.headers["ETag"]})
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+        # Only the token checks reach the database
+        assert not any("contact" in statement for statement in statements)
+        assert (second.content, second.headers["ETag"]) == (first.content, first.headers["ETag"])
+        assert again.json() == one.json()
+        assert revalidated.status_code == 304
+
+        client.put(f"/contacts/{contact_id}", json={"name": "Ada Lovelace", "user_id": user_id}, headers=headers)
+        assert client.get("/contacts/?fields=id,name", headers=headers).json()[0]["name"] == "Ada Lovelace"
+        assert client.get(f"/contacts/{contact_id}", headers=headers).json()["name"] == "Ada Lovelace"
+
+        client.post("/phones/", json={"number": "5550100", "contact_id": contact_id}, headers=headers)
+        assert [phone["number"] for phone in client.get(f"/contacts/{contact_id}", headers=headers).json()["phones"]] == ["5550100"]
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.db import init_db
+
+
+def test_search_ranks_name_email_and_phone_matches(login):
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        headers, user_id = login(client)
+        other_headers, other_id = login(client)
+
+        def contact(name: str, email: str | None = None, number: str | None = None, owner=(headers, user_id)):
+            contact_id = client.post("/contacts/", json={"name": name, "email": email, "user_id": owner[1]}, headers=owner[0]).json()["id"]
+            if number:
+                client.post("/phones/", json={"number": number, "contact_id": contact_id}, headers=owner[0])
+
+        contact("Annette Jones")
+        contact("Joanna Annabel")
+        contact("Bob", "ann@example.com")
+        contact("Carol", number="555 0100")
+        contact("Dave")
+        contact("Anna Other", owner=(other_headers, other_id))
+
+        def names(q: str) -> list[str]:
+            response = client.get("/contacts/search", params={"q": q}, headers=headers)
+            assert response.status_code == 200
+            return [row["name"] for row in response.json()]
+
+        # Name prefix first, then name infix, then other fields
+        assert names("ann") == ["Annette Jones", "Joanna Annabel", "Bob"]
+        assert names("example.com") == ["Bob"]
+        assert names("(555) 01") == ["Carol"]
+        assert names("Anna Other") == []
+        assert names("zzz") == []
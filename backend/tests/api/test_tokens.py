@@ -0,0 +1,73 @@
+import json
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.api import deps
+from app.api.deps import create_access_token, decode_token, token_cache
+
+
+def test_verified_tokens_are_cached():
+    token = create_access_token({"sub": "ada"})
+    hits, misses = token_cache.hits, token_cache.misses
+
+    assert decode_token(token)["sub"] == "ada"
+    assert decode_token(token)["sub"] == "ada"
+    assert (token_cache.hits - hits, token_cache.misses - misses) == (1, 1)
+
+
+def test_cached_claims_are_not_shared():
+    token = create_access_token({"sub": "ada"})
+    decode_token(token)["sub"] = "mallory"
+
+    assert decode_token(token)["sub"] == "ada"
+
+
+def test_invalid_tokens_are_not_cached():
+    token = create_access_token({"sub": "ada"}) + "x"
+    size = len(token_cache)
+
+    with pytest.raises(HTTPException):
+        decode_token(token)
+    assert len(token_cache) == size
+
+
+def test_expired_tokens_are_rejected():
+    token = create_access_token({"sub": "ada"}, expires_delta=timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException) as error:
+        decode_token(token)
+    assert error.value.detail == "Token has expired"
+
+
+def test_asymmetric_keys(monkeypatch):
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    private_jwk = {**json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key)), "kid": "k1", "alg": "ES256"}
+    public_jwk = {**json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key())), "kid": "k1", "alg": "ES256"}
+
+    monkeypatch.setattr(deps, "signing_key", jwt.PyJWK(private_jwk))
+    monkeypatch.setattr(deps, "verification_keys", {"k1": jwt.PyJWK(public_jwk)})
+    token = create_access_token({"sub": "ada"})
+
+    assert jwt.get_unverified_header(token) == {"alg": "ES256", "kid": "k1", "typ": "JWT"}
+    assert decode_token(token)["sub"] == "ada"
+
+    monkeypatch.setattr(deps, "verification_keys", {"k2": jwt.PyJWK(public_jwk)})
+    with pytest.raises(HTTPException):
+        decode_token(create_access_token({"sub": "grace"}))
+
+
+def test_private_key_alone_verifies_its_tokens(monkeypatch):
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_jwk = jwt.PyJWK({**json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key)), "kid": "k1", "alg": "RS256"})
+
+    public_jwk = deps._public_jwk(private_jwk)
+    assert "d" not in public_jwk.Algorithm.to_jwk(public_jwk.key, as_dict=True)
+
+    monkeypatch.setattr(deps, "signing_key", private_jwk)
+    monkeypatch.setattr(deps, "verification_keys", {"k1": public_jwk})
+    assert decode_token(create_access_token({"sub": "ada"}))["sub"] == "ada"
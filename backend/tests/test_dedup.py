@@ -0,0 +1,66 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.dedup import contact_keys, email_key, name_key, refresh_keys, soundex
+
+
+def test_soundex():
+    assert [soundex(word) for word in ("robert", "rupert", "ashcraft", "tymczak", "pfister")] == ["R163", "R163", "A261", "T522", "P236"]
+
+
+def test_name_key_ignores_spelling_order_and_accents():
+    assert name_key("Jon Smith") == name_key("John Smith") == name_key("Smith, John")
+    assert name_key("Zoë Müller") == name_key("Zoe Mueller")
+    assert name_key("John Smith") != name_key("John Baker")
+    assert name_key("123") is None
+
+
+def test_email_key():
+    assert email_key("John.Smith+work@Example.com") == "john.smith"
+    assert email_key("not an email") is None
+    assert email_key(None) is None
+
+
+def test_contact_keys():
+    assert contact_keys("Ann", "ann@example.com", ["15550100", None]) == {
+        ("name", "A500"), ("email", "ann"), ("phone", "15550100"),
+    }
+
+
+class _Session:
+    """Answers every query with the same user row and records the calls."""
+
+    def __init__(self, contacts_version: int, dedup_seq: int):
+        self.row = SimpleNamespace(contacts_version=contacts_version, dedup_seq=dedup_seq)
+        self.queries = []
+        self.commits = 0
+
+    async def exec(self, query):
+        self.queries.append(query)
+        return SimpleNamespace(first=lambda: self.row)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_refresh_keys_checks_staleness_before_locking():
+    session = _Session(contacts_version=5, dedup_seq=5)
+    asyncio.run(refresh_keys(session, uuid.uuid4()))
+    assert len(session.queries) == 1
+    assert session.queries[0]._for_update_arg is None
+    assert session.commits == 0
+
+    # Stale before the lock, fresh after it: another refresh won
+    session = _Session(contacts_version=5, dedup_seq=4)
+
+    async def exec(query):
+        session.queries.append(query)
+        if query._for_update_arg is not None:
+            session.row = SimpleNamespace(contacts_version=5, dedup_seq=5)
+        return SimpleNamespace(first=lambda: session.row)
+
+    session.exec = exec
+    asyncio.run(refresh_keys(session, uuid.uuid4()))
+    assert [query._for_update_arg is not None for query in session.queries] == [False, True]
+    assert session.commits == 1
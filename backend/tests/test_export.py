@@ -0,0 +1,56 @@
+import asyncio
+import gzip
+import uuid
+from types import SimpleNamespace
+
+import vobject
+
+from app.export import accepts_gzip, encode_chunks, to_vcard
+from app.vcf import card_fields, iter_vcards
+
+
+def _contact(name: str, email: str | None = None):
+    return SimpleNamespace(id=uuid.uuid4(), name=name, email=email)
+
+
+async def _texts(texts: list[str]):
+    for text in texts:
+        yield text
+
+
+def _encode(texts: list[str], **kwargs) -> list[bytes]:
+    async def run():
+        return [chunk async for chunk in encode_chunks(_texts(texts), **kwargs)]
+    return asyncio.run(run())
+
+
+def test_vcard_reads_back():
+    name = "Zoë, the \"long\"; named " + "x" * 80
+    text = to_vcard(_contact(name, "zoe@example.com"), [("+15550100", "cell"), ("+15550101", None)])
+
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+
+    async def run():
+        return [card async for card in iter_vcards(_texts([text.encode()]))]
+    (card,) = asyncio.run(run())
+    vcard = vobject.readOne(card)
+    assert card_fields(vcard) == (name, "zoe@example.com")
+    assert [(tel.value, tel.params.get("TYPE")) for tel in vcard.tel_list] == [("+15550100", ["cell"]), ("+15550101", None)]
+
+
+def test_chunks_are_joined_and_gzipped():
+    texts = [f"line {i}\n" for i in range(1000)]
+
+    plain = _encode(texts, chunk_size=1024)
+    assert all(len(chunk) >= 1024 for chunk in plain[:-1])
+    assert b"".join(plain) == "".join(texts).encode()
+
+    assert gzip.decompress(b"".join(_encode(texts, gzip=True, chunk_size=1024))) == "".join(texts).encode()
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
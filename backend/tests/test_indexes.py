@@ -0,0 +1,54 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, delete, tuple_
+from sqlmodel import SQLModel, select
+
+from app.models import Contact, ImportJob, Phone, SecurityQA, Tombstone, User
+
+# Each list/lookup query must be answered from its index, without a full
+# table scan or a separate sort step.
+USER_ID = uuid.uuid4()
+
+QUERIES = {
+    "ix_contact_user_id_name_id": select(Contact.id, Contact.name, Contact.email, Contact.user_id)
+        .where(Contact.user_id == USER_ID, tuple_(Contact.name, Contact.id) > tuple_("a", uuid.uuid4()))
+        .order_by(Contact.name, Contact.id)
+        .limit(100),
+    "ix_contact_user_id_change_seq": select(Contact.id, Contact.change_seq)
+        .where(Contact.user_id == USER_ID, Contact.change_seq > 5, Contact.change_seq <= 9)
+        .order_by(Contact.change_seq, Contact.id)
+        .limit(100),
+    "ix_tombstone_user_id_change_seq": select(Tombstone.kind, Tombstone.object_id)
+        .where(Tombstone.user_id == USER_ID, Tombstone.change_seq > 5, Tombstone.change_seq <= 9)
+        .order_by(Tombstone.change_seq),
+    "ix_phone_contact_id_number_id": select(Phone).where(Phone.contact_id.in_([uuid.uuid4(), uuid.uuid4()])),
+    "ix_phone_number_digits": select(Phone.id).where(Phone.number_digits.in_(["15550102000", "5550102000"])),
+    "ix_user_username": select(User.id, User.email).where(User.username == "ada"),
+    "ix_securityqa_user_id": delete(SecurityQA).where(SecurityQA.user_id == USER_ID),
+    "ix_importjob_queued": select(ImportJob).where(ImportJob.status == "queued").order_by(ImportJob.created_at).limit(1),
+}
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.connect() as conn:
+        yield conn
+
+
+@pytest.mark.parametrize("index", QUERIES)
+def test_query_uses_index(connection, index):
+    compiled = QUERIES[index].compile(connection, compile_kwargs={"literal_binds": True})
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+    assert any(f"INDEX {index}" in step for step in plan), plan
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_primary_keys_are_not_indexed_twice():
+    for table in SQLModel.metadata.tables.values():
+        primary_key = list(table.primary_key.columns)
+        assert all(list(index.columns) != primary_key for index in table.indexes), table.name
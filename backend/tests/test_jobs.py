@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db import async_session_maker, init_db
+from app.jobs import DatabaseImportQueue, ImportQueue
+from app.models import ImportJob
+
+
+def test_import_queue_is_abstract():
+    with pytest.raises(TypeError):
+        ImportQueue()
+
+
+def test_jobs_without_a_heartbeat_are_failed(tmp_path):
+    async def scenario():
+        await init_db()
+        queue = DatabaseImportQueue()
+        now = datetime.now(timezone.utc)
+        spool = tmp_path / "lost.vcf"
+        spool.write_text("BEGIN:VCARD\r\n")
+        lost = ImportJob(user_id=uuid.uuid4(), path=str(spool), status="running", heartbeat_at=now - timedelta(minutes=10))
+        alive = ImportJob(user_id=uuid.uuid4(), path=str(tmp_path / "alive.vcf"), status="running", heartbeat_at=now)
+        async with async_session_maker() as session:
+            session.add_all([lost, alive])
+            await session.commit()
+
+        assert await queue.fail_stale(stale_seconds=60) == [lost.id]
+        assert (await queue.get(lost.id)).status == "failed"
+        assert (await queue.get(alive.id)).status == "running"
+        assert not spool.exists()
+
+        await queue.heartbeat(alive)
+        assert await queue.fail_stale(stale_seconds=60) == []
+
+    asyncio.run(scenario())
+
+
+def test_stale_jobs_are_swept_without_polling_workers(tmp_path):
+    async def scenario():
+        await init_db()
+        queue = DatabaseImportQueue()
+        spool = tmp_path / "lost.vcf"
+        spool.write_text("BEGIN:VCARD\r\n")
+        lost = ImportJob(user_id=uuid.uuid4(), path=str(spool), status="running", heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        async with async_session_maker() as session:
+            session.add(lost)
+            await session.commit()
+
+        await queue.start(workers=0)
+        try:
+            # The sweep removes the spool file once the job is marked failed
+            for _ in range(100):
+                if not spool.exists():
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+        assert (await queue.get(lost.id)).status == "failed"
+
+    asyncio.run(scenario())
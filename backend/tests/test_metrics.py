@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.main import app
+from app.metrics import Histogram, RequestStats, _request_stats, instrument_engine
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Test latency.", (0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+
+    assert histogram.render() == [
+        "# HELP latency Test latency.",
+        "# TYPE latency histogram",
+        'latency_bucket{route="/a",le="0.1"} 1',
+        'latency_bucket{route="/a",le="1.0"} 2',
+        'latency_bucket{route="/a",le="+Inf"} 2',
+        'latency_sum{route="/a"} 0.55',
+        'latency_count{route="/a"} 2',
+    ]
+
+
+def test_requests_are_timed_and_exported():
+    client = TestClient(app)
+    response = client.get("/greet")
+
+    assert response.headers["server-timing"].startswith('db;dur=0.0;desc="0 queries"')
+    metrics = client.get("/utils/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/greet",status="200"}' in metrics
+    assert 'cache_hits_total{cache="jwt"}' in metrics
+
+
+def test_failed_statements_leave_no_timing_behind():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        try:
+            async with engine.connect() as conn:
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM missing"))
+                await conn.execute(text("SELECT 1"))
+                assert conn.sync_connection.info == {}
+        finally:
+            _request_stats.reset(token)
+            await engine.dispose()
+        assert stats.queries == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+import asyncio
+import hashlib
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app import passwords
+from app.passwords import hash_password, verify_password
+
+
+def test_hash_and_verify():
+    hashed = asyncio.run(hash_password("secret"))
+
+    assert hashed.startswith("$argon2id$")
+    assert asyncio.run(verify_password("secret", hashed)) == (True, None)
+    assert asyncio.run(verify_password("wrong", hashed)) == (False, None)
+
+
+def test_legacy_sha256_hash_is_upgraded():
+    legacy = hashlib.sha256(b"secret").hexdigest()
+
+    valid, new_hash = asyncio.run(verify_password("secret", legacy))
+    assert valid and new_hash.startswith("$argon2id$")
+    assert asyncio.run(verify_password("secret", new_hash)) == (True, None)
+    assert asyncio.run(verify_password("wrong", legacy)) == (False, None)
+
+
+def test_outdated_parameters_are_upgraded():
+    weak = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),)).hash("secret")
+
+    valid, new_hash = asyncio.run(verify_password("secret", weak))
+    assert valid and new_hash != weak
+    assert f"m={passwords.PASSWORD_HASH_MEMORY_COST},t={passwords.PASSWORD_HASH_TIME_COST}" in new_hash
+
+
+def test_unknown_user_never_verifies():
+    assert asyncio.run(verify_password("secret", None)) == (False, None)
@@ -0,0 +1,37 @@
+import pytest
+
+from app import phone_numbers
+from app.phone_numbers import lookup_keys, normalize_number, number_digits
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+1 (555) 010-2000", "15550102000"),
+    ("15550102000", "15550102000"),
+    ("0044 20 7946 0958", "442079460958"),
+    ("555.010.2000 ext. 12", "5550102000;ext=12"),
+    ("+1 555 010 2000 x7", "15550102000;ext=7"),
+    ("+880-1712-345678", "8801712345678"),
+])
+def test_normalize_number(raw, expected):
+    assert normalize_number(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "call me", "12", "+1234567890123456", "555-CALL", "5550100 ext. 1234567"])
+def test_normalize_rejects_non_numbers(raw):
+    with pytest.raises(ValueError):
+        normalize_number(raw)
+
+
+def test_default_country_code(monkeypatch):
+    monkeypatch.setattr(phone_numbers, "DEFAULT_COUNTRY_CODE", "1")
+    assert normalize_number("(555) 010-2000") == "15550102000"
+    assert normalize_number("1 555 010 2000") == "15550102000"
+
+    monkeypatch.setattr(phone_numbers, "DEFAULT_COUNTRY_CODE", "880")
+    assert normalize_number("01712-345678") == "8801712345678"
+    assert lookup_keys("+8801712345678") == ["8801712345678", "1712345678", "01712345678"]
+
+
+def test_formats_share_lookup_digits():
+    assert number_digits(normalize_number("+1 (555) 010-2000")) == number_digits(normalize_number("15550102000"))
+    assert number_digits(normalize_number("+1 (555) 010-2000 ext. 12")) == "15550102000"
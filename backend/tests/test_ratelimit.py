@@ -0,0 +1,71 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import create_access_token
+from app.ratelimit import MemoryBuckets, RateLimitMiddleware, client_key, parse_limit, route_group
+
+
+def test_bucket_allows_burst_then_refills():
+    async def scenario():
+        buckets = MemoryBuckets()
+        rate, burst = parse_limit("3/30")
+        assert [await buckets.take("key", rate, burst) for _ in range(3)] == [0, 0, 0]
+        wait = await buckets.take("key", rate, burst)
+        assert 9 < wait <= 10
+
+        buckets._buckets["key"][1] -= 10
+        assert await buckets.take("key", rate, burst) == 0
+
+    asyncio.run(scenario())
+
+
+def test_buckets_are_bounded():
+    async def scenario():
+        buckets = MemoryBuckets(maxsize=2)
+        for key in "abc":
+            await buckets.take(key, 1, 1)
+        assert list(buckets._buckets) == ["b", "c"]
+
+        # Least recently used goes first: "b" was just used, so "c" is dropped
+        await buckets.take("b", 1, 1)
+        await buckets.take("d", 1, 1)
+        assert list(buckets._buckets) == ["b", "d"]
+
+    asyncio.run(scenario())
+
+
+def test_ipv6_clients_share_their_64():
+    assert client_key("2001:db8:1:2:aaaa::1") == client_key("2001:db8:1:2:bbbb::2") == "2001:db8:1:2::/64"
+    assert client_key("2001:db8:1:3::1") != client_key("2001:db8:1:2::1")
+    assert client_key("::ffff:192.0.2.1") == "192.0.2.1"
+    assert client_key("192.0.2.1") == "192.0.2.1"
+    assert client_key("testclient") == "testclient"
+
+
+def test_route_groups():
+    assert route_group("POST", "/auth/login") == "auth"
+    assert route_group("GET", "/auth/users/me") == "reads"
+    assert route_group("POST", "/contacts/upload-vcf") == "imports"
+    assert route_group("DELETE", "/contacts/1") == "writes"
+    assert route_group("GET", "/utils/health-check") is None
+
+
+def test_middleware_limits_each_user_and_ip():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limits={"reads": "2/60"}, buckets=MemoryBuckets())
+
+    @app.get("/contacts/")
+    async def read():
+        return []
+
+    client = TestClient(app)
+    ada = {"Authorization": f"Bearer {create_access_token({'sub': 'ada'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob'})}"}
+
+    assert [client.get("/contacts/", headers=ada).status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/contacts/", headers=ada)
+    assert int(response.headers["retry-after"]) == 30
+    assert client.get("/contacts/", headers=bob).status_code == 200
+    assert [client.get("/contacts/").status_code for _ in range(3)] == [200, 200, 429]
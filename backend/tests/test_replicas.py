@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+
+from sqlalchemy import text
+
+from app import replicas
+from app.db import async_session_maker
+from app.replicas import ReplicaPool
+
+
+def test_reads_rotate_over_healthy_replicas(tmp_path):
+    async def scenario():
+        pool = ReplicaPool([f"sqlite+aiosqlite:///{tmp_path}/a.db", f"sqlite+aiosqlite:///{tmp_path}/b.db", "sqlite+aiosqlite:////missing/dir/c.db"])
+        await pool.start()
+        try:
+            assert pool.healthy == pool.engines[:2]
+            assert {pool.engine_for(None) for _ in range(4)} == set(pool.engines[:2])
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_writers_read_from_the_primary(tmp_path):
+    pool = ReplicaPool([f"sqlite+aiosqlite:///{tmp_path}/a.db"])
+    writer, reader = uuid.uuid4(), uuid.uuid4()
+
+    pool.pin(writer)
+    assert pool.engine_for(writer) is None
+    assert pool.engine_for(reader) is pool.engines[0]
+
+    pool.pins.ttl = 0
+    pool.pin(writer)
+    assert pool.engine_for(writer) is pool.engines[0]
+
+
+def test_without_replicas_everything_reads_from_the_primary():
+    pool = ReplicaPool([])
+    pool.pin(uuid.uuid4())
+    assert pool.engine_for(None) is None
+    assert len(pool.pins) == 0
+
+
+def test_writers_are_pinned_again_on_commit(tmp_path, monkeypatch):
+    pool = ReplicaPool([f"sqlite+aiosqlite:///{tmp_path}/a.db"])
+    monkeypatch.setattr(replicas, "replica_pool", pool)
+    writer = uuid.uuid4()
+
+    async def scenario():
+        async with async_session_maker() as session:
+            pool.pins.ttl = 0.01
+            pool.pin_on_commit(session, writer)
+            await session.exec(text("SELECT 1"))
+            # A slow transaction outlives the pin taken when it started
+            await asyncio.sleep(0.02)
+            assert pool.engine_for(writer) is pool.engines[0]
+
+            pool.pins.ttl = 60
+            await session.commit()
+            assert pool.engine_for(writer) is None
+
+    asyncio.run(scenario())
+
+
+def test_health_check_times_out_while_connecting(tmp_path, monkeypatch):
+    pool = ReplicaPool([f"sqlite+aiosqlite:///{tmp_path}/a.db"])
+    monkeypatch.setattr(replicas, "REPLICA_HEALTH_TIMEOUT", 0.01)
+
+    async def unreachable(engine):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(pool, "_ping", unreachable)
+    asyncio.run(asyncio.wait_for(pool.check(), 1))
+    assert pool.healthy == []
@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+
+from app.response_cache import CachedResponse, MemoryResponseCache
+
+
+def test_invalidate_drops_the_users_entries():
+    async def scenario():
+        cache = MemoryResponseCache()
+        user, other = uuid.uuid4(), uuid.uuid4()
+        for owner in (user, other):
+            _, generation = await cache.get(owner, "contacts?")
+            await cache.set(owner, "contacts?", generation, CachedResponse(b"[]", {"ETag": '"v1"'}))
+
+        await cache.invalidate(user)
+        assert (await cache.get(user, "contacts?"))[0] is None
+        assert (await cache.get(other, "contacts?"))[0].body == b"[]"
+        assert (cache.hits, cache.misses, len(cache)) == (1, 3, 1)
+
+    asyncio.run(scenario())
+
+
+def test_reads_racing_a_write_are_not_stored():
+    async def scenario():
+        cache = MemoryResponseCache()
+        user = uuid.uuid4()
+        _, generation = await cache.get(user, "contacts?")
+        # The write commits and invalidates while the read is still querying
+        await cache.invalidate(user)
+        await cache.set(user, "contacts?", generation, CachedResponse(b"stale", {}))
+
+        assert (await cache.get(user, "contacts?"))[0] is None
+
+    asyncio.run(scenario())
+
+
+def test_evicts_least_recently_used_beyond_max_bytes():
+    async def scenario():
+        cache = MemoryResponseCache(max_bytes=10)
+        user = uuid.uuid4()
+        for key in ("a", "b"):
+            await cache.set(user, key, 0, CachedResponse(b"12345", {}))
+        await cache.get(user, "a")
+        await cache.set(user, "c", 0, CachedResponse(b"12345", {}))
+
+        assert (await cache.get(user, "a"))[0] is not None
+        assert (await cache.get(user, "b"))[0] is None
+        assert (len(cache), cache.size) == (2, 10)
+
+    asyncio.run(scenario())
+
+
+def test_generations_are_bounded_without_serving_stale_reads():
+    async def scenario():
+        cache = MemoryResponseCache(max_users=2)
+        users = [uuid.uuid4() for _ in range(3)]
+        _, generation = await cache.get(users[0], "contacts?")
+        for user in users:
+            await cache.invalidate(user)
+        assert list(cache._generations) == users[1:]
+
+        # users[0] was forgotten, but its read from before the write is still refused
+        await cache.set(users[0], "contacts?", generation, CachedResponse(b"stale", {}))
+        assert (await cache.get(users[0], "contacts?"))[0] is None
+
+        _, generation = await cache.get(users[0], "contacts?")
+        await cache.set(users[0], "contacts?", generation, CachedResponse(b"[]", {}))
+        assert (await cache.get(users[0], "contacts?"))[0].body == b"[]"
+
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.db import init_db
+from app.revocation import RevocationStore, SharedRevocationStore, token_key
+
+
+def test_revocation_is_shared_through_the_database():
+    async def scenario():
+        await init_db()
+        first, second = SharedRevocationStore(), SharedRevocationStore()
+        await second.sync()
+
+        jti = uuid.uuid4().hex
+        await first.revoke(jti, datetime.now(timezone.utc) + timedelta(days=1))
+        assert first.is_revoked(jti)
+        assert not second.is_revoked(jti)
+
+        await second.sync()
+        assert second.is_revoked(jti)
+
+    asyncio.run(scenario())
+
+
+def test_expired_revocations_are_purged():
+    async def scenario():
+        await init_db()
+        store = RevocationStore()
+        jti = uuid.uuid4().hex
+        await store.revoke(jti, datetime.now(timezone.utc) - timedelta(seconds=1))
+        assert not store.is_revoked(jti)
+
+        await store.purge()
+        fresh = RevocationStore()
+        await fresh.sync()
+        assert not fresh.is_revoked(jti)
+
+    asyncio.run(scenario())
+
+
+def test_token_key_falls_back_to_digest():
+    assert token_key("a.b.c", {"jti": "abc"}) == "abc"
+    assert len(token_key("a.b.c", {})) == 64
@@ -0,0 +1,31 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.search import search_query
+
+
+def _postgres_sql(q: str) -> str:
+    return str(search_query("postgresql", uuid.uuid4(), q, 20).compile(dialect=postgresql.dialect()))
+
+
+def test_postgres_search_matches_contacts_and_phones_in_separate_branches():
+    sql = _postgres_sql("jon 555")
+    contacts, phones = sql.split("UNION ALL")
+
+    # Only indexed contact predicates are ORed; phones are matched on their own
+    assert "EXISTS" not in sql
+    assert "phone" not in contacts.split("WHERE", 1)[1]
+    assert "contact.name %" in contacts and "@@ to_tsquery" in contacts
+    assert "phone.number_digits LIKE" in phones
+    assert "GROUP BY" in sql
+
+
+def test_postgres_search_matches_phones_only_on_digits():
+    assert "UNION ALL" not in _postgres_sql("jon")
+    compiled = search_query("postgresql", uuid.uuid4(), "(555) 01", 20).compile(dialect=postgresql.dialect())
+    assert "%55501%" in compiled.params.values()
+
+
+def test_postgres_search_without_words_skips_full_text():
+    assert "to_tsquery" not in _postgres_sql("+-")
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.vcf import iter_vcards
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _collect(data: bytes, size: int = 7) -> list[str]:
+    async def run():
+        return [card async for card in iter_vcards(_chunks(data, size))]
+    return asyncio.run(run())
+
+
+def test_cards_split_across_chunks():
+    data = b"BEGIN:VCARD\r\nFN:Alice\r\nEND:VCARD\r\nnoise\r\nBEGIN:VCARD\r\nFN:Bob\r\nEND:VCARD\r\n"
+
+    assert _collect(data) == [
+        "BEGIN:VCARD\nFN:Alice\nEND:VCARD",
+        "BEGIN:VCARD\nFN:Bob\nEND:VCARD",
+    ]
+
+
+def test_folded_lines_are_unfolded():
+    data = b"BEGIN:VCARD\r\nNOTE:a long\r\n  note\r\nEND:VCARD"
+
+    assert _collect(data) == ["BEGIN:VCARD\nNOTE:a long note\nEND:VCARD"]
+
+
+def test_decoding_falls_back_to_latin1():
+    data = "BEGIN:VCARD\nFN:Zoë\nEND:VCARD\n".encode("utf-8") + "BEGIN:VCARD\nFN:Renée\nEND:VCARD\n".encode("latin-1")
+
+    assert _collect(data, size=4) == [
+        "BEGIN:VCARD\nFN:Zoë\nEND:VCARD",
+        "BEGIN:VCARD\nFN:Renée\nEND:VCARD",
+    ]
+
+
+def test_latin1_fallback_is_per_line():
+    data = "BEGIN:VCARD\nFN:Zoë\nNOTE:北京\nEND:VCARD\n".encode("utf-8") + "BEGIN:VCARD\nFN:Renée\nEND:VCARD\n".encode("latin-1")
+
+    # All in one chunk: the UTF-8 lines before the latin-1 byte stay UTF-8
+    assert _collect(data, size=len(data)) == [
+        "BEGIN:VCARD\nFN:Zoë\nNOTE:北京\nEND:VCARD",
+        "BEGIN:VCARD\nFN:Renée\nEND:VCARD",
+    ]
+
+
+def test_utf16_with_bom():
+    data = "BEGIN:VCARD\r\nFN:Zoë\r\nEND:VCARD\r\n".encode("utf-16")
+
+    assert _collect(data, size=5) == ["BEGIN:VCARD\nFN:Zoë\nEND:VCARD"]
@@ -11,6 +11,9 @@ import {
   DialogTrigger,
 } from './ui/dialog';
 import { Upload, FileText } from 'lucide-react';
+import type { ImportJob } from '../lib/types';
+
+const IMPORT_POLL_INTERVAL_MS = 1000;
 
 interface UploadVCFDialogProps {
   userId: string;
@@ -65,9 +68,19 @@ export const UploadVCFDialog: React.FC<UploadVCFDialogProps> = ({ userId, onCont
         },
       });
 
-      console.log('Upload successful:', response.data);
-      const imported = response.data.count || 0;
-      const skipped = response.data.skipped || 0;
+      console.log('Upload queued:', response.data);
+      let job: ImportJob = response.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_INTERVAL_MS));
+        job = (await api.get<ImportJob>(`/contacts/imports/${job.id}`)).data;
+      }
+
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to upload VCF file');
+      }
+
+      const imported = job.contacts_created || 0;
+      const skipped = job.contacts_skipped || 0;
       let successMsg = `Successfully imported ${imported} contact(s)`;
       if (skipped > 0) {
         successMsg += ` (${skipped} skipped)`;
@@ -85,7 +98,7 @@ export const UploadVCFDialog: React.FC<UploadVCFDialogProps> = ({ userId, onCont
       }, 1500);
     } catch (err: any) {
       console.error('Failed to upload VCF file:', err);
-      setError(err.response?.data?.detail || 'Failed to upload VCF file');
+      setError(err.response?.data?.detail || err.message || 'Failed to upload VCF file');
     } finally {
       setLoading(false);
     }
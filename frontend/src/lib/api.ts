@@ -10,6 +10,8 @@ import type {
 } from './types';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000';
+// Largest page the API serves (app/api/pagination.py)
+const MAX_PAGE_SIZE = 1000;
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -95,8 +97,17 @@ export const authAPI = {
 // Contacts API
 export const contactsAPI = {
   getAll: async (): Promise<Contact[]> => {
-    const response = await api.get<Contact[]>('/contacts/');
-    return response.data;
+    // The list is paginated: follow X-Next-Cursor until the last page
+    const contacts: Contact[] = [];
+    let cursor: string | undefined;
+    do {
+      const response = await api.get<Contact[]>('/contacts/', {
+        params: { limit: MAX_PAGE_SIZE, cursor },
+      });
+      contacts.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return contacts;
   },
 
   getById: async (id: string): Promise<Contact> => {
@@ -20,6 +20,17 @@ export interface Phone {
   contact_id: string;
 }
 
+export interface ImportJob {
+  id: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  filename: string | null;
+  cards_parsed: number;
+  contacts_created: number;
+  contacts_skipped: number;
+  warnings: string[];
+  error: string | null;
+}
+
 // Deprecated - Security QA feature is no longer active
 export interface SecurityQA {
   id: string;